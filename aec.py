@@ -1,6 +1,23 @@
 # aec.py
 """Acoustic Echo Cancellation using NLMS adaptive filter."""
 import numpy as np
+from scipy.fft import irfft, next_fast_len, rfft
+from scipy.linalg import solve_toeplitz
+
+try:
+    from numba import njit, prange
+    _HAVE_NUMBA = True
+except ImportError:
+    # numba ships with mlx-whisper; without it the NumPy/FFT path is used.
+    _HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        return lambda fn: fn
+
+    prange = range
+
+# Reference peak below which system audio is treated as silent (~-80 dBFS)
+SILENT_REF_PEAK = 1e-4
 
 
 def nlms_echo_cancel(
@@ -9,12 +26,22 @@ def nlms_echo_cancel(
     filter_len: int = 1600,
     step_size: float = 0.5,
     block_size: int = 256,
+    out: np.ndarray | None = None,
+    vss: bool = False,
+    vss_alpha: float = 0.97,
+    vss_gamma: float = 0.01,
+    mu_min: float = 0.01,
+    mu_max: float = 1.0,
+    w_init: np.ndarray | None = None,
 ) -> np.ndarray:
     """Remove echo of `ref` (system audio) from `mic` (microphone) signal.
 
     Uses block NLMS (Normalized Least Mean Squares) adaptive filtering.
     The filter learns how the system audio leaks into the mic (through
-    speakers → room → mic) and subtracts that estimated echo.
+    speakers → room → mic) and subtracts that estimated echo. The whole
+    block loop runs in a single Numba kernel when numba is installed;
+    otherwise the echo estimate and weight gradient of each block are
+    computed with FFT convolution.
 
     Args:
         mic: Microphone signal (voice + echo), float32.
@@ -24,45 +51,344 @@ def nlms_echo_cancel(
         step_size: NLMS step size (0 < mu <= 1). Higher = faster adaptation,
                     more noise. 0.5 is a good default.
         block_size: Process this many samples at a time for efficiency.
+        out: Optional preallocated float32 buffer of length
+             min(len(mic), len(ref)) to write the result into.
+        vss: Use a variable step size instead of `step_size` (Kwong-Johnston
+             style, per block): start at `mu_max` and track
+             mu = vss_alpha * mu + vss_gamma * (block error energy / block
+             mic energy), clipped to [mu_min, mu_max]. Large steps while the
+             error is high, small ones once converged — short segments
+             converge in a fraction of the samples.
+        w_init: Optional starting filter of length `filter_len` (see
+                estimate_echo_path) instead of all zeros.
 
     Returns:
-        Estimated voice signal (mic with echo removed), float32.
+        Estimated voice signal (mic with echo removed), float32. This is
+        `out` when one was given.
     """
+    # Keep the whole path in float32 — a float64 caller is converted once here
+    # instead of upcasting every block (no copy when already float32)
+    mic = np.asarray(mic, dtype=np.float32)
+    ref = np.asarray(ref, dtype=np.float32)
+
     n = min(len(mic), len(ref))
+    # Every sample is written below, so the buffer needs no zero-fill
+    output = np.empty(n, dtype=np.float32) if out is None else out
     if n < filter_len:
-        return mic[:n].copy()
+        output[:] = mic[:n]
+        return output
+
+    # No system audio was playing: there is no echo to learn, so skip the
+    # filter entirely (two reduction passes, no temporary)
+    ref = ref[:n]
+    if _is_silent(ref):
+        output[:] = mic[:n]
+        return output
 
-    output = np.zeros(n, dtype=np.float32)
     output[:filter_len] = mic[:filter_len]
-    w = np.zeros(filter_len, dtype=np.float64)
-    eps = 1e-8
+    # float32 state throughout: half the memory traffic and twice the SIMD
+    # lanes of float64, and plenty of precision for a 100ms speech filter
+    if w_init is None:
+        w = np.zeros(filter_len, dtype=np.float32)
+    else:
+        w = np.array(w_init, dtype=np.float32)  # Adapted in place: own copy
+    eps = np.float32(1e-8)
+
+    # Energy of ref[start-L:start], carried across blocks as a running sum
+    head = ref[:filter_len].astype(np.float64)
+    ref_energy = float(head @ head)
+
+    if _HAVE_NUMBA:
+        # Reverse the reference once per call so every filter row is a
+        # forward, contiguous slice that the kernel can vectorize
+        ref_rev = np.ascontiguousarray(ref[n - 1::-1])
+        _nlms_kernel(
+            mic, ref_rev, w, step_size, eps, block_size, ref_energy, output,
+            vss, vss_alpha, vss_gamma, mu_min, mu_max,
+        )
+        return output
+
+    step = mu_max if vss else step_size
+    for start in range(filter_len, n, block_size):
+        end = min(start + block_size, n)
+        if _is_silent(ref[start - filter_len:end - 1]):
+            # Nothing for this block's rows to echo: pass the mic through,
+            # don't adapt, and just slide the energy window
+            output[start:end] = mic[start:end]
+            entering = ref[start:end].astype(np.float64)
+            leaving = ref[start - filter_len:end - filter_len].astype(np.float64)
+            ref_energy += float(entering @ entering) - float(leaving @ leaving)
+            continue
+        ref_energy = _nlms_block_fft(
+            ref, w, mic, start, end - start, step, eps, ref_energy, output,
+        )
+        if vss:
+            err = output[start:end]
+            near = mic[start:end]
+            ratio = float(err @ err) / (float(near @ near) + 1e-10)
+            step = min(max(vss_alpha * step + vss_gamma * ratio, mu_min), mu_max)
 
-    # Pre-allocate working buffer ONCE (reused every block iteration)
-    ref_matrix = np.zeros((block_size, filter_len), dtype=np.float64)
+    return output
+
+
+@njit(fastmath=True, cache=True)
+def _nlms_kernel(mic, ref_rev, w, step_size, eps, block_size, ref_energy, output,
+                 vss, vss_alpha, vss_gamma, mu_min, mu_max):
+    """Run every NLMS block in native code, updating `w` and `output` in place.
+
+    `ref_rev` is the reference reversed, so the row for sample idx
+    (ref[idx-1], ref[idx-2], ...) is the forward slice ref_rev[n-idx:n-idx+L].
+    Each row's echo estimate, error, normalization and gradient contribution
+    are computed in one sweep while that slice is still in cache. With `vss`
+    the step is updated after every block as in nlms_echo_cancel. Blocks
+    whose reference span is silent pass the mic through without adapting.
+    """
+    n = output.shape[0]
+    filter_len = w.shape[0]
+    grad = np.empty(filter_len, dtype=np.float32)
+    step = mu_max if vss else step_size
 
     for start in range(filter_len, n, block_size):
         end = min(start + block_size, n)
         blen = end - start
 
-        # Build reference matrix: each row is ref[i-L:i] reversed (convolution)
-        # Use a slice for the final (possibly short) block — zero-cost view
-        rm = ref_matrix[:blen]
-        for j in range(blen):
-            idx = start + j
-            rm[j] = ref[idx - filter_len:idx][::-1]
+        # Rows of this block read ref[start-L:end-1], i.e. this ref_rev range
+        silent = True
+        for j in range(n - end + 1, n - start + filter_len):
+            if abs(ref_rev[j]) >= SILENT_REF_PEAK:
+                silent = False
+                break
+        if silent:
+            for idx in range(start, end):
+                output[idx] = mic[idx]
+                r_in = np.float64(ref_rev[n - idx - 1])
+                r_out = np.float64(ref_rev[n - idx - 1 + filter_len])
+                ref_energy += r_in * r_in - r_out * r_out
+            continue
+
+        grad[:] = 0.0
+        err_energy = 0.0
+        mic_energy = 0.0
+
+        for idx in range(start, end):
+            base = n - idx
+            acc = np.float32(0.0)
+            for k in range(filter_len):
+                acc += ref_rev[base + k] * w[k]
+            err = mic[idx] - acc
+            output[idx] = err
+            err_energy += np.float64(err) * err
+            mic_energy += np.float64(mic[idx]) * mic[idx]
+
+            # Mean-gradient contribution of this row, normalized by its energy
+            scale = np.float32(err / ((max(ref_energy, 0.0) + eps) * blen))
+            for k in range(filter_len):
+                grad[k] += ref_rev[base + k] * scale
+
+            # Slide the energy window by one sample: ref[idx] in, ref[idx-L] out
+            r_in = np.float64(ref_rev[base - 1])
+            r_out = np.float64(ref_rev[base - 1 + filter_len])
+            ref_energy += r_in * r_in - r_out * r_out
+
+        for k in range(filter_len):
+            w[k] += step * grad[k]
+
+        if vss:
+            ratio = err_energy / (mic_energy + 1e-10)
+            step = min(max(vss_alpha * step + vss_gamma * ratio, mu_min), mu_max)
+
+    return ref_energy
+
+
+def _nlms_block_fft(ref, w, mic, start, blen, step_size, eps, ref_energy, output):
+    """Process one NLMS block with NumPy/SciPy (used when numba is unavailable).
+
+    Returns the running reference energy for the next block.
+    """
+    filter_len = len(w)
+    end = start + blen
+
+    # Row j of the (implicit) reference matrix is ref[idx-L:idx] reversed,
+    # so every tap touched by this block lives in ref[start-L:end-1].
+    # Working on that window directly avoids building the Toeplitz matrix.
+    x = ref[start - filter_len:end - 1]
+    nfft = next_fast_len(len(x), real=True)
+    x_spec = rfft(x, nfft)
+
+    # Filter output = estimated echo for this block (FFT convolution)
+    echo_est = irfft(x_spec * rfft(w, nfft), nfft)[filter_len - 1:filter_len - 1 + blen]
+
+    # Error = mic - echo estimate ≈ voice
+    error = mic[start:end] - echo_est
+    output[start:end] = error
+
+    # Per-row reference energy ||ref[idx-L:idx]||²: the running energy plus
+    # the samples entering minus those leaving the window, O(blen) per block
+    entering = ref[start:end].astype(np.float64)
+    leaving = ref[start - filter_len:end - filter_len].astype(np.float64)
+    delta = np.cumsum(entering * entering - leaving * leaving)
+    norms = np.empty(blen)
+    norms[0] = ref_energy
+    norms[1:] = ref_energy + delta[:-1]
+    norms = (np.maximum(norms, 0.0) + eps).astype(np.float32)
+
+    # NLMS weight update using block mean gradient. The mean of
+    # rm[j] * error[j] / norms[j] is a cross-correlation of the reference
+    # window with the scaled error: reuse the window's spectrum and take the
+    # conjugate instead of reversing either sequence. Tap k sits at lag L-1-k,
+    # so the gradient is a reversed view of the correlation (no copy).
+    scaled = error / norms
+    corr = irfft(x_spec * np.conj(rfft(scaled, nfft)), nfft)
+    w += step_size * corr[filter_len - 1::-1] / blen
+
+    return ref_energy + delta[-1]
+
+
+def estimate_echo_path(
+    mic: np.ndarray,
+    ref: np.ndarray,
+    filter_len: int = 1600,
+    n_samples: int = 4000,
+    loading: float = 0.1,
+) -> np.ndarray | None:
+    """Least-squares estimate of the echo path, to warm-start NLMS.
+
+    Solves the Wiener equations R w = p over the first `n_samples` (0.25 s at
+    16kHz), where R is the reference autocorrelation (Toeplitz, solved by
+    Levinson recursion) and p the mic/reference cross-correlation, both
+    computed with one FFT each. Plain cross-correlation is only a valid
+    estimate for white references; the solve also handles tonal and colored
+    audio. `loading` adds that fraction of the reference power to R's
+    diagonal for stability.
+
+    Returns weights in nlms_echo_cancel's layout (w[k] applies to the
+    reference delayed by k + 1 samples), or None when there is too little
+    or only silent reference audio.
+    """
+    n = min(len(mic), len(ref), n_samples)
+    if n <= filter_len:
+        return None
+    r = np.asarray(ref[:n], dtype=np.float64)
+    if _is_silent(r):
+        return None
+    m = np.asarray(mic[:n], dtype=np.float64)
+
+    nfft = next_fast_len(2 * n, real=True)
+    r_spec = rfft(r, nfft)
+    autocorr = irfft(r_spec * np.conj(r_spec), nfft)[:filter_len]
+    # Lags 1..L: sum over t of mic[t] * ref[t - k]
+    crosscorr = irfft(rfft(m, nfft) * np.conj(r_spec), nfft)[1:filter_len + 1]
+
+    autocorr[0] *= 1.0 + loading
+    return solve_toeplitz(autocorr, crosscorr).astype(np.float32)
+
 
-        # Filter output = estimated echo for this block
-        echo_est = rm @ w
+def warmup_kernels() -> None:
+    """Compile the Numba kernels ahead of the first recording.
 
-        # Error = mic - echo estimate ≈ voice
-        mic_block = mic[start:end].astype(np.float64)
-        error = mic_block - echo_est
-        output[start:end] = error.astype(np.float32)
+    Runs each kernel once on a few hundred samples with the argument types
+    the real calls use, so JIT compilation (or loading the on-disk cache)
+    happens at startup instead of inside the first transcription.
+    """
+    if not _HAVE_NUMBA:
+        return
+    t = np.arange(512, dtype=np.float32)
+    ref = np.sin(t * np.float32(0.3)) * np.float32(0.1)
+    mic = ref * np.float32(0.5)
+    nlms_echo_cancel(mic, ref, filter_len=64, block_size=64)
+
+    frame_len = 64
+    rms = _frame_rms(mic, len(mic) // frame_len, frame_len)
+    _apply_gate(mic, np.empty_like(mic), rms, np.float32(rms.mean()), frame_len)
+
+
+def _is_silent(x: np.ndarray) -> bool:
+    """True when every sample of `x` is below SILENT_REF_PEAK in magnitude."""
+    return max(float(x.max()), -float(x.min())) < SILENT_REF_PEAK
+
+
+def fdaf_echo_cancel(
+    mic: np.ndarray,
+    ref: np.ndarray,
+    filter_len: int = 1600,
+    step_size: float = 0.5,
+    block_size: int = 256,
+    out: np.ndarray | None = None,
+) -> np.ndarray:
+    """Remove echo of `ref` from `mic` with a frequency-domain adaptive filter.
+
+    Partitioned-block FDAF: the filter is split into filter_len / block_size
+    partitions, each adapted per frequency bin with overlap-save FFTs, so a
+    block costs O(P · B log B) instead of the O(B · L) of time-domain NLMS.
+    Per-bin normalization makes it converge much faster than block NLMS on
+    broadband references such as speech and music.
+
+    Args:
+        mic: Microphone signal (voice + echo), float32.
+        ref: Reference signal (system audio output), float32, same sample rate.
+        filter_len: Echo tail covered, in samples (rounded up to whole blocks).
+        step_size: Adaptation step (0 < mu <= 1).
+        block_size: Samples per block; the FFT size is twice this.
+        out: Optional preallocated float32 buffer of length
+             min(len(mic), len(ref)) to write the result into.
+
+    Returns:
+        Estimated voice signal, float32. This is `out` when one was given.
+    """
+    mic = np.asarray(mic, dtype=np.float32)
+    ref = np.asarray(ref, dtype=np.float32)
+
+    n = min(len(mic), len(ref))
+    output = np.empty(n, dtype=np.float32) if out is None else out
+    if n < filter_len:
+        output[:] = mic[:n]
+        return output
+
+    ref = ref[:n]
+    if _is_silent(ref):
+        output[:] = mic[:n]
+        return output
+
+    B = block_size
+    P = -(-filter_len // B)
+    nfft = 2 * B
+
+    # Zero-padded copies so every block is a plain slice: the reference gets
+    # B leading zeros (the first window's history), the mic a zero tail
+    ref_pad = np.zeros(n + 2 * B, dtype=np.float32)
+    ref_pad[B:B + n] = ref
+    mic_pad = np.zeros(n + B, dtype=np.float32)
+    mic_pad[:n] = mic[:n]
+
+    # Partition weights and the spectra of the last P reference windows,
+    # newest first, so partition p always pairs with the window p blocks back
+    W = np.zeros((P, B + 1), dtype=np.complex64)
+    X = np.zeros((P, B + 1), dtype=np.complex64)
+    err_win = np.zeros(nfft, dtype=np.float32)
+
+    for start in range(0, n, B):
+        X[1:] = X[:-1]
+        X[0] = rfft(ref_pad[start:start + nfft])
 
-        # NLMS weight update using block mean gradient
-        norms = np.sum(rm ** 2, axis=1, keepdims=True) + eps
-        gradients = rm * (error[:, np.newaxis] / norms)
-        w += step_size * np.mean(gradients, axis=0)
+        # Overlap-save: the last B samples of the circular convolution are valid
+        echo_est = irfft(np.einsum("pk,pk->k", W, X), nfft)[B:]
+        error = mic_pad[start:start + B] - echo_est
+        m = min(B, n - start)
+        output[start:start + m] = error[:m]
+
+        # Per-bin reference power over the filter span. Regularized by its
+        # mean so bins the reference leaves empty (narrowband audio) don't
+        # amplify whatever the mic has there.
+        power = np.einsum("pk,pk->k", X.real, X.real) + np.einsum("pk,pk->k", X.imag, X.imag)
+        power += power.mean() + 1e-8
+
+        err_win[B:] = error
+        grad = np.conj(X) * (step_size * rfft(err_win) / power)
+
+        # Gradient constraint: keep each partition a causal B-tap filter
+        taps = irfft(grad, nfft, axis=-1)
+        taps[:, B:] = 0.0
+        W += rfft(taps, axis=-1)
 
     return output
 
@@ -73,6 +399,7 @@ def noise_gate(
     frame_ms: int = 20,
     percentile: float = 25.0,
     threshold_factor: float = 3.0,
+    out: np.ndarray | None = None,
 ) -> np.ndarray:
     """Suppress low-amplitude frames that are likely residual echo, not speech.
 
@@ -88,36 +415,92 @@ def noise_gate(
             25th percentile captures the quieter (non-speech) frames.
         threshold_factor: Multiply noise floor by this to get the gate threshold.
             Higher = more aggressive gating. 3.0 is a safe default.
+        out: Optional float32 buffer, same length as `signal`, to write the
+            result into. May be `signal` itself to gate in place.
 
     Returns:
-        Gated signal, float32, same length as input.
+        Gated signal, float32, same length as input. This is `out` when one
+        was given.
     """
     frame_len = int(sample_rate * frame_ms / 1000)
     n_frames = len(signal) // frame_len
     if n_frames == 0:
-        return signal.copy()
+        return _copy_into(signal, out)
 
     # Compute RMS energy per frame
-    frames = signal[: n_frames * frame_len].reshape(n_frames, frame_len)
-    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    if _HAVE_NUMBA:
+        rms = _frame_rms(signal, n_frames, frame_len)
+    else:
+        frames = signal[: n_frames * frame_len].reshape(n_frames, frame_len)
+        rms = np.sqrt(np.einsum("ij,ij->i", frames, frames) / frame_len)
 
-    # Adaptive threshold from noise floor
-    noise_floor = np.percentile(rms, percentile)
-    loud_level = np.percentile(rms, 75)
+    # Adaptive threshold from noise floor. Both quantiles come from a single
+    # partition (quickselect) of the frame energies, not two sorts.
+    noise_floor, loud_level = np.percentile(rms, [percentile, 75])
     threshold = noise_floor * threshold_factor
 
     # If signal has uniform amplitude (no clear quiet vs loud distinction),
     # there's nothing to gate — it's all speech or all silence.
     if threshold < 1e-8 or noise_floor > loud_level * 0.5:
-        return signal.copy()
+        return _copy_into(signal, out)
 
     # Apply soft gain: quadratic curve from 0 (silence) to 1 (at threshold)
-    output = signal.copy()
-    for i in range(n_frames):
-        if rms[i] < threshold:
-            gain = (rms[i] / threshold) ** 2
-            start = i * frame_len
-            end = start + frame_len
-            output[start:end] *= gain
+    if _HAVE_NUMBA:
+        # Copy and gain in one pass over the signal (in place when aliased)
+        output = np.empty_like(signal) if out is None else out
+        _apply_gate(signal, output, rms, np.float32(threshold), frame_len)
+        return output
+
+    output = _copy_into(signal, out)
+    gains = np.ones(n_frames, dtype=np.float32)
+    quiet = rms < threshold
+    gains[quiet] = (rms[quiet] / threshold) ** 2
+
+    # Broadcast one gain per frame across the whole signal in a single pass
+    framed = output[: n_frames * frame_len].reshape(n_frames, frame_len)
+    framed *= gains[:, np.newaxis]
 
     return output
+
+
+def _copy_into(signal: np.ndarray, out: np.ndarray | None) -> np.ndarray:
+    """Copy signal into out (a fresh array if None); a no-op when they alias."""
+    if out is None:
+        return signal.copy()
+    if out is not signal:
+        out[:] = signal
+    return out
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _frame_rms(signal, n_frames, frame_len):
+    """Per-frame RMS in one streaming pass, without a signal-sized temporary."""
+    rms = np.empty(n_frames, dtype=np.float32)
+    for f in prange(n_frames):
+        base = f * frame_len
+        acc = np.float32(0.0)
+        for k in range(frame_len):
+            v = signal[base + k]
+            acc += v * v
+        rms[f] = np.sqrt(acc / frame_len)
+    return rms
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _apply_gate(signal, output, rms, threshold, frame_len):
+    """Write `signal` into `output`, scaling quiet frames by (rms / threshold)².
+
+    `output` may be `signal` itself. Samples past the last whole frame are
+    copied unchanged.
+    """
+    n_frames = rms.shape[0]
+    for f in prange(n_frames):
+        r = rms[f]
+        gain = np.float32(1.0)
+        if r < threshold:
+            gain = (r / threshold) ** 2
+        base = f * frame_len
+        for k in range(frame_len):
+            output[base + k] = signal[base + k] * gain
+    for i in range(n_frames * frame_len, signal.shape[0]):
+        output[i] = signal[i]
@@ -1,23 +1,31 @@
 # app.py
 import asyncio
 import gc
+import hashlib
 import os
+import struct
 import sys
 import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from datetime import date
 from pathlib import Path
 
+import orjson
 from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 
-from recorder import AudioRecorder, get_wav_duration
+from recorder import AudioRecorder
 from transcriber import WhisperTranscriber
 from clipboard import copy_to_clipboard, paste_clipboard
 from state import AppState, AppStateManager
 from history import TranscriptionHistory
+from config import display_name
+from pipeline import stop_and_transcribe
+from aec import warmup_kernels
 
 
 def _get_static_dir():
@@ -29,7 +37,60 @@ def _get_static_dir():
 
 
 STATIC_DIR = _get_static_dir()
-SUPPORTED_AUDIO_EXT = {".wav", ".mp3", ".m4a", ".flac", ".ogg", ".webm", ".wma", ".aac"}
+SUPPORTED_AUDIO_EXT = frozenset({".wav", ".mp3", ".m4a", ".flac", ".ogg", ".webm", ".wma", ".aac"})
+BAR_PUSH_INTERVAL_S = 1 / 30  # Waveform refresh rate for /ws/bar
+# /ws/bar amplitude frames are binary: one tag byte + little-endian float32
+_AMPLITUDE_FRAME = struct.Struct("<cf")
+
+
+async def _send(ws: WebSocket, obj):
+    """Send obj as a JSON text frame, encoded with orjson."""
+    await ws.send_text(orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode())
+
+
+class _StaticPage:
+    """An HTML page from static/, read once and served with an ETag.
+
+    Clients revalidate on every load (Cache-Control: no-cache) and get an
+    empty 304 when their copy is current.
+    """
+
+    def __init__(self, name: str):
+        body = Path(STATIC_DIR, name).read_bytes()
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        self.etag = etag
+        self.full = HTMLResponse(body, headers=headers)
+        self.not_modified = Response(status_code=304, headers=headers)
+
+    def respond(self, request: Request) -> Response:
+        if request.headers.get("if-none-match") == self.etag:
+            return self.not_modified
+        return self.full
+
+
+class _BarOutbox:
+    """Pending /ws/bar updates for one connection.
+
+    State/warning/hotkey messages are posted on the event loop into a
+    bounded ring, dropping the oldest if a slow client falls behind, and
+    `ready` is set whenever there is something to send. `amplitude` is a
+    single slot the recorder thread overwrites directly; `amplitude_ready`
+    is set on every update, so the amplitude pusher sleeps while nothing is
+    recording.
+    """
+
+    MAX_EVENTS = 64
+
+    def __init__(self):
+        self.events: deque = deque(maxlen=self.MAX_EVENTS)
+        self.amplitude = None
+        self.amplitude_ready = asyncio.Event()
+        self.ready = asyncio.Event()
+
+    def post(self, msg: dict):
+        self.events.append(msg)
+        self.ready.set()
 
 
 def create_app(
@@ -49,6 +110,33 @@ def create_app(
     # Wire recorder amplitude to state manager
     rec.on_amplitude = sm.push_amplitude
 
+    # One long-lived worker for UI transcription jobs: no thread spawn per
+    # stop. The hotkey and pipeline workers call Whisper outside it; the
+    # transcriber's own lock keeps their calls from overlapping
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="whisper")
+
+    # The recorder is shared with the global hotkey: UI stop and cancel only
+    # act on a capture the UI itself started. Touched only on the event loop.
+    ui_capture = False
+
+    def _ui_start() -> bool:
+        nonlocal ui_capture
+        if not rec.start():
+            return False
+        ui_capture = True
+        return True
+
+    def _ui_release() -> bool:
+        """Give up the UI's capture; False if the UI does not hold one."""
+        nonlocal ui_capture
+        owned, ui_capture = ui_capture, False
+        return owned
+
+    # Static pages never change while the app runs — build the responses
+    # once from the raw bytes (no per-request read, decode or re-encode)
+    index_page = _StaticPage("index.html")
+    bar_page = _StaticPage("bar.html")
+
     @asynccontextmanager
     async def lifespan(app):
         def _init_models():
@@ -56,8 +144,19 @@ def create_app(
                 pipe.load_vad()
             if hasattr(txr, 'warmup'):
                 txr.warmup()
+            try:
+                warmup_kernels()
+            except Exception as e:
+                print(f"AEC kernel warmup failed: {e}")
         threading.Thread(target=_init_models, daemon=True).start()
         yield
+        executor.shutdown(wait=False)
+        if history is None:
+            hist.close()
+        else:
+            # A caller-supplied history may still be shared with the hotkey
+            # thread: commit queued rows but leave it open
+            hist.flush()
 
     app = FastAPI(lifespan=lifespan)
 
@@ -66,20 +165,16 @@ def create_app(
     app.state.history = hist
 
     @app.get("/")
-    async def index():
-        index_path = os.path.join(STATIC_DIR, "index.html")
-        with open(index_path) as f:
-            return HTMLResponse(f.read())
+    async def index(request: Request):
+        return index_page.respond(request)
 
     @app.get("/bar")
-    async def bar_page():
-        bar_path = os.path.join(STATIC_DIR, "bar.html")
-        with open(bar_path) as f:
-            return HTMLResponse(f.read())
+    async def bar(request: Request):
+        return bar_page.respond(request)
 
     @app.get("/api/history")
-    async def get_history(limit: int = 50, offset: int = 0):
-        entries = hist.get_recent(limit=limit, offset=offset)
+    async def get_history(limit: int = 50, offset: int = 0, before_id: int | None = None):
+        entries = hist.get_recent(limit=limit, offset=offset, before_id=before_id)
         return JSONResponse({"entries": entries, "total": hist.count()})
 
     @app.get("/api/history/search")
@@ -218,81 +313,89 @@ def create_app(
                 action = data.get("action")
 
                 if action == "start":
-                    rec.start()
+                    if not _ui_start():
+                        await _send(ws, {
+                            "type": "error",
+                            "message": "Already recording from the hotkey.",
+                        })
+                        continue
                     sm.set_state(AppState.RECORDING)
                     if pipe is not None and pipe.vad_available:
                         sys_chunks = rec.get_sys_audio_chunks()
                         pipe.start(sys_audio_chunks=sys_chunks)
                         rec.on_vad_chunk = pipe.feed
-                    await ws.send_json({"type": "status", "status": "recording"})
+                    await _send(ws, {"type": "status", "status": "recording"})
 
                 elif action == "stop":
+                    if not _ui_release():
+                        # The refused start already reported the error
+                        continue
                     try:
-                        text, elapsed, audio_duration = await asyncio.to_thread(
-                            _ws_stop_and_transcribe, rec, txr, pipe
+                        loop = asyncio.get_running_loop()
+                        text, elapsed, audio_duration = await loop.run_in_executor(
+                            executor, _ws_stop_and_transcribe, rec, txr, pipe
                         )
                         if text is None:
                             sm.set_state(AppState.IDLE)
-                            await ws.send_json({
+                            await _send(ws, {
                                 "type": "error",
                                 "message": "Recording too short. Hold the button longer.",
                             })
                             continue
                         sm.set_state(AppState.PROCESSING)
-                        await ws.send_json({"type": "status", "status": "transcribing"})
-                        copy_to_clipboard(text)
-                        paste_clipboard()
+                        await _send(ws, {"type": "status", "status": "transcribing"})
+                        # The pasteboard write and the key events block: keep them off the loop
+                        await asyncio.to_thread(copy_to_clipboard, text)
+                        await asyncio.to_thread(paste_clipboard)
                         hist.add(text, duration=audio_duration, latency=elapsed)
-                        gc.collect()
                         sm.set_state(AppState.IDLE)
-                        await ws.send_json({
+                        await _send(ws, {
                             "type": "result",
                             "text": text,
-                            "latency": elapsed,
+                            "latency": round(elapsed, 2),
                         })
                     except Exception as e:
                         sm.set_state(AppState.ERROR)
-                        await ws.send_json({
+                        await _send(ws, {
                             "type": "error",
                             "message": str(e),
                         })
 
                 elif action == "transcribe_file":
                     file_path = data.get("path", "")
-                    p = Path(file_path)
-                    if not p.is_file():
-                        await ws.send_json({
+                    # stat() can block on slow or network volumes: run it off the loop
+                    if not await asyncio.to_thread(os.path.isfile, file_path):
+                        await _send(ws, {
                             "type": "error",
                             "message": f"File not found: {file_path}",
                         })
                         continue
+                    p = Path(file_path)
                     if p.suffix.lower() not in SUPPORTED_AUDIO_EXT:
-                        await ws.send_json({
+                        await _send(ws, {
                             "type": "error",
                             "message": f"Unsupported format: {p.suffix}",
                         })
                         continue
-                    await ws.send_json({
+                    await _send(ws, {
                         "type": "file_status",
                         "status": "transcribing",
                         "message": f"Transcribing {p.name}...",
                     })
                     try:
-                        start_time = time.time()
-                        text = await asyncio.to_thread(txr.transcribe, str(p))
-                        elapsed = round(time.time() - start_time, 2)
-                        out_name = f"{p.stem}_{date.today().isoformat()}_transcription.txt"
-                        out_path = p.parent / out_name
-                        out_path.write_text(text, encoding="utf-8")
+                        loop = asyncio.get_running_loop()
+                        text, out_path, elapsed = await loop.run_in_executor(
+                            executor, _transcribe_file, txr, p
+                        )
                         hist.add(text, latency=elapsed)
-                        await ws.send_json({
+                        await _send(ws, {
                             "type": "file_result",
                             "text": text,
                             "output_path": str(out_path),
-                            "latency": elapsed,
+                            "latency": round(elapsed, 2),
                         })
                     except Exception as e:
-                        await ws.send_json({
+                        await _send(ws, {
                             "type": "error",
                             "message": str(e),
                         })
@@ -305,7 +408,7 @@ def create_app(
                     if hasattr(txr, 'status'):
                         status_data["status"] = txr.status
                         status_data["message"] = txr.status_message
-                    await ws.send_json(status_data)
+                    await _send(ws, status_data)
 
         except WebSocketDisconnect:
             pass
@@ -314,142 +417,128 @@ def create_app(
     async def bar_websocket(ws: WebSocket):
         await ws.accept()
         # Send initial state
-        await ws.send_json({"type": "state", "state": sm.state.value})
+        await _send(ws, {"type": "state", "state": sm.state.value})
 
-        # Queue for state changes and amplitude data pushed from background threads
-        loop = asyncio.get_event_loop()
-        queue: asyncio.Queue = asyncio.Queue()
+        # Structural updates from background threads are handed to the event
+        # loop and collected in a bounded outbox for the pusher task
+        loop = asyncio.get_running_loop()
+        outbox = _BarOutbox()
 
         def on_state_change(old, new):
-            loop.call_soon_threadsafe(queue.put_nowait, {"type": "state", "state": new.value})
+            loop.call_soon_threadsafe(outbox.post, {"type": "state", "state": new.value})
 
         def on_amplitude(val):
-            loop.call_soon_threadsafe(queue.put_nowait, {"type": "amplitude", "value": round(val, 4)})
+            # Plain attribute store from the recorder thread (atomic under the
+            # GIL), then wake the pusher. Signalling every update avoids a
+            # check-then-store race with the pusher's swap that could leave
+            # the slot full and the event clear; sends stay rate-limited.
+            outbox.amplitude = val
+            loop.call_soon_threadsafe(outbox.amplitude_ready.set)
 
         def on_warning(msg):
-            loop.call_soon_threadsafe(queue.put_nowait, {"type": "warning", "message": msg})
+            loop.call_soon_threadsafe(outbox.post, {"type": "warning", "message": msg})
 
         def on_hotkey_change(serialized):
-            from config import display_name
             loop.call_soon_threadsafe(
-                queue.put_nowait,
+                outbox.post,
                 {"type": "hotkey", "display": display_name(serialized)}
             )
 
-        sm.on_state_change(on_state_change)
-        sm.on_amplitude(on_amplitude)
-        sm.on_warning(on_warning)
+        unsubscribe = [
+            sm.on_state_change(on_state_change),
+            sm.on_amplitude(on_amplitude),
+            sm.on_warning(on_warning),
+        ]
         if settings:
-            settings.on_hotkey_change(on_hotkey_change)
+            unsubscribe.append(settings.on_hotkey_change(on_hotkey_change))
 
         # Send initial hotkey display name
         if settings:
-            await ws.send_json({"type": "hotkey", "display": settings.hotkey_display})
+            await _send(ws, {"type": "hotkey", "display": settings.hotkey_display})
 
+        pushers = []
         try:
-            # Run two tasks: listen for incoming messages and push outgoing updates
+            # Listen for incoming messages while two tasks push outgoing updates
             async def push_updates():
                 while True:
-                    msg = await queue.get()
-                    await ws.send_json(msg)
+                    await outbox.ready.wait()
+                    outbox.ready.clear()
+                    if len(outbox.events) == 1:
+                        await _send(ws, outbox.events.popleft())
+                    elif outbox.events:
+                        # Several events piled up: one frame for all of them
+                        items = list(outbox.events)
+                        outbox.events.clear()
+                        await _send(ws, {"type": "batch", "items": items})
+
+            async def push_amplitude():
+                # Send the latest amplitude at most at the UI rate, independent
+                # of the recorder's block rate; idle until a new value arrives
+                while True:
+                    await outbox.amplitude_ready.wait()
+                    outbox.amplitude_ready.clear()
+                    amp, outbox.amplitude = outbox.amplitude, None
+                    if amp is not None:
+                        await ws.send_bytes(_AMPLITUDE_FRAME.pack(b"A", amp))
+                    await asyncio.sleep(BAR_PUSH_INTERVAL_S)
 
             async def receive_commands():
                 while True:
                     data = await ws.receive_json()
                     action = data.get("action")
                     if action == "start":
-                        rec.start()
+                        if not _ui_start():
+                            continue
                         sm.set_state(AppState.RECORDING)
                         if pipe is not None and pipe.vad_available:
                             sys_chunks = rec.get_sys_audio_chunks()
                             pipe.start(sys_audio_chunks=sys_chunks)
                             rec.on_vad_chunk = pipe.feed
                     elif action == "stop":
-                        threading.Thread(
-                            target=_bar_stop_and_transcribe,
-                            args=(rec, txr, sm, hist, pipe),
-                            daemon=True,
-                        ).start()
+                        if _ui_release():
+                            executor.submit(_bar_stop_and_transcribe, rec, txr, sm, hist, pipe)
                     elif action == "cancel":
-                        if rec.is_recording:
-                            rec.stop()  # discard audio
-                        sm.set_state(AppState.IDLE)
+                        if _ui_release():
+                            rec.discard()
+                            sm.set_state(AppState.IDLE)
+                        elif not rec.is_recording:
+                            # Nothing to cancel: just reset the bar
+                            sm.set_state(AppState.IDLE)
 
-            await asyncio.gather(push_updates(), receive_commands())
+            pushers = [
+                asyncio.ensure_future(push_updates()),
+                asyncio.ensure_future(push_amplitude()),
+            ]
+            await receive_commands()
         except WebSocketDisconnect:
             pass
         finally:
+            # The pushers only exit on a failed send, so stop them explicitly
+            for task in pushers:
+                task.cancel()
             # Remove callbacks
-            if on_state_change in sm._state_callbacks:
-                sm._state_callbacks.remove(on_state_change)
-            if on_amplitude in sm._amplitude_callbacks:
-                sm._amplitude_callbacks.remove(on_amplitude)
-            if on_warning in sm._warning_callbacks:
-                sm._warning_callbacks.remove(on_warning)
-            if settings and on_hotkey_change in settings._hotkey_callbacks:
-                settings._hotkey_callbacks.remove(on_hotkey_change)
+            for remove in unsubscribe:
+                remove()
 
     return app
 
 
-def _stop_and_transcribe(rec, txr, pipe):
-    """Shared stop+transcribe logic for websocket and bar handlers.
+def _transcribe_file(txr, p: Path):
+    """Transcribe an audio file and save the text next to it.
 
-    Returns (text, elapsed, audio_duration) or (None, 0, 0) if no audio.
+    Returns (text, output_path, elapsed).
     """
-    use_streaming = pipe is not None and pipe.vad_available and pipe._active
-
-    if use_streaming:
-        rec.on_vad_chunk = None
-        mic_audio, sys_audio = rec.stop_raw()
-
-        if mic_audio is None or len(mic_audio) == 0:
-            pipe.stop(None)
-            return None, 0, 0
-
-        audio_duration = round(len(mic_audio) / rec.sample_rate, 2)
-
-        if audio_duration < pipe.SHORT_RECORDING_THRESHOLD_S:
-            pipe.stop(None)
-            if sys_audio is not None and len(sys_audio) > 0:
-                try:
-                    from aec import nlms_echo_cancel, noise_gate
-                    mic_audio = nlms_echo_cancel(mic_audio, sys_audio)
-                    mic_audio = noise_gate(mic_audio, sample_rate=rec.sample_rate)
-                except Exception:
-                    pass
-            del sys_audio
-            start_time = time.time()
-            text = txr.transcribe_array(mic_audio)
-            elapsed = round(time.time() - start_time, 2)
-            del mic_audio
-        else:
-            del mic_audio
-            start_time = time.time()
-            results = pipe.stop(sys_audio)
-            elapsed = round(time.time() - start_time, 2)
-            del sys_audio
-            text = " ".join(r.text for r in results if r.text)
-
-        return text or None, elapsed, audio_duration
-    else:
-        wav_path = rec.stop()
-        if not wav_path:
-            return None, 0, 0
-        audio_duration = round(get_wav_duration(wav_path), 2)
-        start_time = time.time()
-        text = txr.transcribe(wav_path)
-        elapsed = round(time.time() - start_time, 2)
-        try:
-            os.unlink(wav_path)
-        except OSError:
-            pass
-        return text or None, elapsed, audio_duration
+    t0 = time.perf_counter()
+    text = txr.transcribe(str(p))
+    elapsed = time.perf_counter() - t0
+    out_path = p.parent / f"{p.stem}_{date.today().isoformat()}_transcription.txt"
+    out_path.write_text(text, encoding="utf-8")
+    return text, out_path, elapsed
 
 
 def _ws_stop_and_transcribe(rec, txr, pipe):
-    """Called from asyncio.to_thread for websocket stop."""
-    text, elapsed, audio_duration = _stop_and_transcribe(rec, txr, pipe)
+    """Executor job for websocket stop: transcribe, then collect garbage off the loop."""
+    text, elapsed, audio_duration = stop_and_transcribe(rec, txr, pipe)
     gc.collect()
     return text, elapsed, audio_duration
 
@@ -458,7 +547,7 @@ def _bar_stop_and_transcribe(rec, txr, sm, hist, pipe=None):
     """Background thread: stop recording, transcribe, update state."""
     sm.set_state(AppState.PROCESSING)
     try:
-        text, elapsed, audio_duration = _stop_and_transcribe(rec, txr, pipe)
+        text, elapsed, audio_duration = stop_and_transcribe(rec, txr, pipe)
         if not text:
             sm.set_state(AppState.IDLE)
             return
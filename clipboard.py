@@ -1,42 +1,88 @@
 import time
 
 import pyperclip
-import Quartz
-from Quartz import (
-    CGEventCreateKeyboardEvent,
-    CGEventSetFlags,
-    CGEventPost,
-    CGEventSourceCreate,
-    kCGHIDEventTap,
-    kCGEventFlagMaskCommand,
-    kCGEventSourceStateCombinedSessionState,
-)
 
 # macOS keycode for 'V'
 _KC_V = 9
+# Hold time between key down and key up of the synthesized Cmd+V
+_KEY_GAP_S = 0.01
+
+# (post, tap, event_down, event_up), built on first paste. Quartz is
+# imported only then, keeping the PyObjC bridge out of app startup.
+_paste_events = None
+
+# (general pasteboard, string type), resolved on first copy. False when
+# AppKit is unavailable and pyperclip is used instead.
+_pasteboard = None
+
+
+def _get_pasteboard():
+    global _pasteboard
+    if _pasteboard is None:
+        try:
+            from AppKit import NSPasteboard, NSPasteboardTypeString
+            _pasteboard = (NSPasteboard.generalPasteboard(), NSPasteboardTypeString)
+        except ImportError:
+            _pasteboard = False
+    return _pasteboard
 
 
 def copy_to_clipboard(text: str) -> None:
+    """Put text on the general pasteboard.
+
+    Writes through NSPasteboard in-process (synchronous, no pbcopy
+    subprocess per call); falls back to pyperclip without AppKit.
+    """
+    pasteboard = _get_pasteboard()
+    if pasteboard:
+        pb, string_type = pasteboard
+        pb.clearContents()
+        if pb.setString_forType_(text, string_type):
+            return
     pyperclip.copy(text)
 
 
-def paste_clipboard() -> None:
-    """Simulate Cmd+V to paste into the currently focused input field."""
-    # Small delay to ensure clipboard is updated
-    time.sleep(0.05)
+def _get_paste_events():
+    global _paste_events
+    if _paste_events is None:
+        from Quartz import (
+            CGEventCreateKeyboardEvent,
+            CGEventSetFlags,
+            CGEventPost,
+            CGEventSourceCreate,
+            kCGHIDEventTap,
+            kCGEventFlagMaskCommand,
+            kCGEventSourceStateCombinedSessionState,
+        )
 
-    # Create a proper event source so macOS treats the events as legitimate
-    source = CGEventSourceCreate(kCGEventSourceStateCombinedSessionState)
+        # Create a proper event source so macOS treats the events as legitimate
+        source = CGEventSourceCreate(kCGEventSourceStateCombinedSessionState)
 
-    # Key down: V with Command modifier
-    event_down = CGEventCreateKeyboardEvent(source, _KC_V, True)
-    CGEventSetFlags(event_down, kCGEventFlagMaskCommand)
+        # Key down / key up: V with Command modifier
+        event_down = CGEventCreateKeyboardEvent(source, _KC_V, True)
+        CGEventSetFlags(event_down, kCGEventFlagMaskCommand)
+        event_up = CGEventCreateKeyboardEvent(source, _KC_V, False)
+        CGEventSetFlags(event_up, kCGEventFlagMaskCommand)
+        _paste_events = (CGEventPost, kCGHIDEventTap, event_down, event_up)
+    return _paste_events
+
+
+def prepare_paste() -> None:
+    """Resolve the pasteboard and build the Cmd+V events ahead of first use."""
+    _get_pasteboard()
+    _get_paste_events()
+
+
+def paste_clipboard() -> None:
+    """Simulate Cmd+V to paste into the currently focused input field.
 
-    # Key up: V with Command modifier
-    event_up = CGEventCreateKeyboardEvent(source, _KC_V, False)
-    CGEventSetFlags(event_up, kCGEventFlagMaskCommand)
+    No settle delay is needed beforehand: copy_to_clipboard has already
+    written the pasteboard synchronously by the time it returns. Blocks for
+    the key gap, so call it off the event loop.
+    """
+    post, tap, event_down, event_up = _get_paste_events()
 
     # Post at HID level so events go through the full macOS event pipeline
-    CGEventPost(kCGHIDEventTap, event_down)
-    time.sleep(0.01)
-    CGEventPost(kCGHIDEventTap, event_up)
+    post(tap, event_down)
+    time.sleep(_KEY_GAP_S)
+    post(tap, event_up)
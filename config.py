@@ -1,4 +1,5 @@
 # config.py
+import functools
 import os
 import json
 import threading
@@ -44,10 +45,10 @@ KEYCODE_TO_NAME = {
 NAME_TO_KEYCODE = {v: k for k, v in KEYCODE_TO_NAME.items()}
 
 # Reverse mapping: name → ALL keycodes (handles MacBook dual keycodes)
-NAME_TO_KEYCODES: dict[str, frozenset[int]] = {}
-for _kc, _name in KEYCODE_TO_NAME.items():
-    NAME_TO_KEYCODES.setdefault(_name, set()).add(_kc)
-NAME_TO_KEYCODES = {k: frozenset(v) for k, v in NAME_TO_KEYCODES.items()}
+NAME_TO_KEYCODES: dict[str, frozenset[int]] = {
+    name: frozenset(kc for kc, n in KEYCODE_TO_NAME.items() if n == name)
+    for name in NAME_TO_KEYCODE
+}
 
 DISPLAY_NAMES = {
     "alt_r": "Right Option",
@@ -92,6 +93,7 @@ def string_to_keycodes(s: str) -> frozenset[int]:
     raise KeyError(f"Unknown key: {s}")
 
 
+@functools.lru_cache(maxsize=256)
 def display_name(serialized: str) -> str:
     """Return human-readable name for a serialized key string."""
     if serialized in DISPLAY_NAMES:
@@ -107,7 +109,7 @@ class SettingsManager:
     def __init__(self):
         self._lock = threading.Lock()
         self._data: dict = {}
-        self._hotkey_callbacks: list = []
+        self._hotkey_callbacks: set = set()
         os.makedirs(CONFIG_DIR, exist_ok=True)
         self._load()
 
@@ -154,7 +156,7 @@ class SettingsManager:
             self._save()
 
         if old != serialized:
-            for cb in self._hotkey_callbacks:
+            for cb in tuple(self._hotkey_callbacks):
                 try:
                     cb(serialized)
                 except Exception:
@@ -172,5 +174,9 @@ class SettingsManager:
             self._save()
 
     def on_hotkey_change(self, callback):
-        """Register a callback: fn(new_serialized_string)."""
-        self._hotkey_callbacks.append(callback)
+        """Register a callback: fn(new_serialized_string).
+
+        Returns a function that unregisters it.
+        """
+        self._hotkey_callbacks.add(callback)
+        return lambda: self._hotkey_callbacks.discard(callback)
@@ -1,6 +1,8 @@
 # history.py
 import os
 import sqlite3
+import threading
+import time
 from datetime import datetime, timezone
 
 
@@ -8,16 +10,60 @@ DEFAULT_DB_PATH = os.path.expanduser("~/.whisperdash/history.db")
 
 
 class TranscriptionHistory:
-    """SQLite-backed transcription history."""
+    """SQLite-backed transcription history.
+
+    Inserts are write-behind: add() queues the row and returns, and a
+    background thread commits queued rows in one transaction. Reads flush
+    pending rows first, so they always see every add() that returned.
+    """
+
+    WRITE_DELAY_S = 0.05  # How long the writer waits for a burst to coalesce
+
+    # Hot-path SQL, kept as constants so each call hits the connection's
+    # prepared-statement cache instead of re-parsing
+    _INSERT_SQL = (
+        "INSERT INTO transcriptions (text, timestamp, duration_seconds, latency_seconds)"
+        " VALUES (?, ?, ?, ?)"
+    )
+    _RECENT_SQL = "SELECT * FROM transcriptions ORDER BY id DESC LIMIT ? OFFSET ?"
+    _RECENT_BEFORE_SQL = "SELECT * FROM transcriptions WHERE id < ? ORDER BY id DESC LIMIT ?"
+    _SEARCH_LIKE_SQL = "SELECT * FROM transcriptions WHERE text LIKE ? ORDER BY id DESC LIMIT ?"
+    _SEARCH_FTS_SQL = (
+        "SELECT t.* FROM transcriptions_fts f"
+        " JOIN transcriptions t ON t.id = f.rowid"
+        " WHERE transcriptions_fts MATCH ? ORDER BY t.id DESC LIMIT ?"
+    )
 
     def __init__(self, db_path: str = DEFAULT_DB_PATH):
         self.db_path = db_path
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        # One connection for the lifetime of the object, shared by the web
+        # handlers and the hotkey/transcription threads under a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            db_path, check_same_thread=False, isolation_level=None,
+            cached_statements=128,
+        )
+        self._conn.row_factory = sqlite3.Row
         self._init_db()
 
+        # Rows queued by add(). _pending_lock is never held across I/O, and
+        # _wake is set exactly while _pending is non-empty.
+        self._pending: list[tuple] = []
+        self._pending_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._writer = threading.Thread(target=self._writer_loop, daemon=True)
+        self._writer.start()
+
     def _init_db(self):
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
+        with self._lock:
+            # WAL lets the history UI read while a transcription is written
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA temp_store=MEMORY")
+            self._conn.execute("PRAGMA mmap_size=67108864")
+            self._conn.execute("""
                 CREATE TABLE IF NOT EXISTS transcriptions (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     text TEXT NOT NULL,
@@ -26,33 +72,143 @@ class TranscriptionHistory:
                     latency_seconds REAL
                 )
             """)
+            self._fts = self._init_fts()
+            # Row count is kept in memory and bumped by add(), so the history
+            # API never runs a full-table COUNT(*)
+            self._count = self._conn.execute(
+                "SELECT COUNT(*) FROM transcriptions"
+            ).fetchone()[0]
+
+    def _init_fts(self) -> bool:
+        """Mirror transcriptions into an FTS5 index kept in sync by triggers.
+
+        Returns False (search falls back to LIKE) if SQLite lacks FTS5.
+        """
+        exists = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'transcriptions_fts'"
+        ).fetchone()
+        try:
+            self._conn.executescript("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS transcriptions_fts USING fts5(
+                    text, content='transcriptions', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                );
+                CREATE TRIGGER IF NOT EXISTS transcriptions_ai AFTER INSERT ON transcriptions BEGIN
+                    INSERT INTO transcriptions_fts(rowid, text) VALUES (new.id, new.text);
+                END;
+                CREATE TRIGGER IF NOT EXISTS transcriptions_ad AFTER DELETE ON transcriptions BEGIN
+                    INSERT INTO transcriptions_fts(transcriptions_fts, rowid, text)
+                        VALUES ('delete', old.id, old.text);
+                END;
+                CREATE TRIGGER IF NOT EXISTS transcriptions_au AFTER UPDATE ON transcriptions BEGIN
+                    INSERT INTO transcriptions_fts(transcriptions_fts, rowid, text)
+                        VALUES ('delete', old.id, old.text);
+                    INSERT INTO transcriptions_fts(rowid, text) VALUES (new.id, new.text);
+                END;
+            """)
+        except sqlite3.OperationalError as e:
+            print(f"FTS5 unavailable, history search will scan: {e}")
+            return False
+        if not exists:
+            # Index rows written before the FTS table existed
+            self._conn.execute(
+                "INSERT INTO transcriptions_fts(transcriptions_fts) VALUES ('rebuild')"
+            )
+        return True
 
     def add(self, text: str, duration: float = 0.0, latency: float = 0.0):
         ts = datetime.now(timezone.utc).isoformat()
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
-                "INSERT INTO transcriptions (text, timestamp, duration_seconds, latency_seconds) VALUES (?, ?, ?, ?)",
-                (text, ts, duration, latency),
-            )
+        # Every caller passes raw timings: store them at display precision
+        row = (text, ts, round(duration, 2), round(latency, 2))
+        with self._pending_lock:
+            self._pending.append(row)
+            self._count += 1
+            self._wake.set()
+
+    def flush(self):
+        """Commit all queued rows in a single transaction."""
+        with self._lock:
+            # The writer can wake after close() released the connection
+            if self._closed:
+                return
+            self._write_pending()
+
+    def _write_pending(self):
+        # Caller holds _lock
+        with self._pending_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, []
+            self._wake.clear()
+        try:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(self._INSERT_SQL, batch)
+            self._conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            print(f"History write failed, {len(batch)} entries dropped: {e}")
+            if self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+            with self._pending_lock:
+                self._count -= len(batch)
 
-    def get_recent(self, limit: int = 50, offset: int = 0) -> list[dict]:
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            rows = conn.execute(
-                "SELECT * FROM transcriptions ORDER BY id DESC LIMIT ? OFFSET ?",
-                (limit, offset),
-            ).fetchall()
-            return [dict(r) for r in rows]
+    def _writer_loop(self):
+        while True:
+            self._wake.wait()
+            if self._closed:
+                return
+            time.sleep(self.WRITE_DELAY_S)
+            self.flush()
+
+    def get_recent(
+        self, limit: int = 50, offset: int = 0, before_id: int | None = None,
+    ) -> list[dict]:
+        """Newest entries first.
+
+        Pass the id of the last entry already shown as `before_id` to fetch
+        the next page by seeking the primary key instead of skipping
+        `offset` rows.
+        """
+        if before_id is not None:
+            sql = self._RECENT_BEFORE_SQL
+            params = (before_id, limit)
+        else:
+            sql = self._RECENT_SQL
+            params = (limit, offset)
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(r) for r in rows]
 
     def search(self, query: str, limit: int = 50) -> list[dict]:
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            rows = conn.execute(
-                "SELECT * FROM transcriptions WHERE text LIKE ? ORDER BY id DESC LIMIT ?",
-                (f"%{query}%", limit),
-            ).fetchall()
-            return [dict(r) for r in rows]
+        """Find entries containing words that start with the query's words."""
+        if not query.strip():
+            return self.get_recent(limit=limit)
+        if not self._fts:
+            sql = self._SEARCH_LIKE_SQL
+            params = (f"%{query}%", limit)
+        else:
+            # Quote the whole query as one phrase (doubling embedded quotes)
+            # so user input is never parsed as FTS syntax; * makes it a prefix
+            sql = self._SEARCH_FTS_SQL
+            phrase = query.replace('"', '""')
+            params = (f'"{phrase}"*', limit)
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(r) for r in rows]
 
     def count(self) -> int:
-        with sqlite3.connect(self.db_path) as conn:
-            return conn.execute("SELECT COUNT(*) FROM transcriptions").fetchone()[0]
+        return self._count
+
+    def close(self):
+        """Commit queued rows and close the connection. Safe to call more than once."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        # Let the writer exit before the connection goes away
+        self._wake.set()
+        self._writer.join()
+        with self._lock:
+            self._write_pending()
+            self._conn.close()
@@ -1,6 +1,9 @@
 # hotkey.py
+import ctypes
 import gc
-import os
+import heapq
+import itertools
+import queue
 import time
 import threading
 
@@ -8,6 +11,7 @@ import Quartz
 from Quartz import (
     CGEventTapCreate,
     CGEventTapEnable,
+    CGEventGetFlags,
     CGEventGetIntegerValueField,
     CFMachPortCreateRunLoopSource,
     CFRunLoopGetCurrent,
@@ -27,15 +31,44 @@ from Quartz import (
     kCFRunLoopCommonModes,
 )
 
-from recorder import AudioRecorder, get_wav_duration
+from pipeline import stop_and_transcribe
+from recorder import AudioRecorder
 from transcriber import WhisperTranscriber
-from clipboard import copy_to_clipboard, paste_clipboard
+from clipboard import copy_to_clipboard, paste_clipboard, prepare_paste
+from config import NAME_TO_KEYCODE, key_to_string, string_to_keycodes
 from state import AppState, AppStateManager
 
 # NX_SYSDEFINED event type for media/special function keys
 NX_SYSDEFINED = 14
 NX_SUBTYPE_AUX_CONTROL_BUTTONS = 8
 
+# Modifier keycode → its device-dependent bit in CGEventGetFlags (IOKit
+# NX_DEVICE*KEYMASK, plus the Fn flag), so a flagsChanged event says by
+# itself whether the key went down or up. Caps Lock is absent: its flag
+# is the lock state, not whether the key is held.
+MODIFIER_DEVICE_FLAGS = {
+    59: 0x00000001,  # ctrl_l
+    56: 0x00000002,  # shift_l
+    60: 0x00000004,  # shift_r
+    55: 0x00000008,  # cmd_l
+    54: 0x00000010,  # cmd_r
+    58: 0x00000020,  # alt_l
+    61: 0x00000040,  # alt_r
+    62: 0x00002000,  # ctrl_r
+    63: 0x00800000,  # fn (kCGEventFlagMaskSecondaryFn)
+}
+
+# Event types delivered to the tap; everything else never reaches Python
+TAP_EVENT_MASK = (
+    (1 << kCGEventKeyDown)
+    | (1 << kCGEventKeyUp)
+    | (1 << kCGEventFlagsChanged)
+    | (1 << NX_SYSDEFINED)
+)
+
+# <sys/qos.h>: highest QoS class, used for work the user is waiting on
+QOS_CLASS_USER_INTERACTIVE = 0x21
+
 # NX key types → serialized key names (for media keys in default MacBook mode)
 NX_KEYTYPE_TO_NAME = {
     0: "f12",   # NX_KEYTYPE_SOUND_UP → Volume Up (F12 on MacBook)
@@ -50,6 +83,69 @@ NX_KEYTYPE_TO_NAME = {
     22: "f6",   # NX_KEYTYPE_ILLUMINATION_DOWN (F6 on some MacBooks)
 }
 
+# NX key type → macOS keycode, resolved once so media keys cost one lookup
+NX_KEYTYPE_TO_KEYCODE = {
+    nx: NAME_TO_KEYCODE[name]
+    for nx, name in NX_KEYTYPE_TO_NAME.items()
+    if name in NAME_TO_KEYCODE
+}
+
+# Bit k set = keycode k can arrive as an NX_SYSDEFINED media-key event
+NX_KEYCODE_MASK = 0
+for _kc in NX_KEYTYPE_TO_KEYCODE.values():
+    NX_KEYCODE_MASK |= 1 << _kc
+del _kc
+
+
+class _Scheduler:
+    """Runs delayed callbacks on one long-lived thread from a deadline heap.
+
+    Stands in for threading.Timer, which spawns a new OS thread per timer.
+    schedule() returns a handle; cancel() marks it dead and the thread
+    discards it when it reaches the top of the heap.
+    """
+
+    def __init__(self):
+        self._heap: list[list] = []
+        self._cond = threading.Condition()
+        self._seq = itertools.count()  # tie-breaker: callables don't compare
+        self._thread: threading.Thread | None = None
+
+    def schedule(self, delay: float, callback) -> list:
+        entry = [time.monotonic() + delay, next(self._seq), callback]
+        with self._cond:
+            heapq.heappush(self._heap, entry)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="hotkey-timers", daemon=True,
+                )
+                self._thread.start()
+            self._cond.notify()
+        return entry
+
+    def cancel(self, handle: list):
+        handle[2] = None
+
+    def _run(self):
+        heap = self._heap
+        while True:
+            with self._cond:
+                while True:
+                    while heap and heap[0][2] is None:
+                        heapq.heappop(heap)
+                    if not heap:
+                        self._cond.wait()
+                        continue
+                    delay = heap[0][0] - time.monotonic()
+                    if delay <= 0:
+                        break
+                    self._cond.wait(delay)
+                callback = heapq.heappop(heap)[2]
+            try:
+                callback()
+            except Exception as e:
+                print(f"Hotkey timer error: {e}")
+
 
 class GlobalHotkey:
     """Listens for a configurable key via HID-level CGEventTap.
@@ -62,6 +158,9 @@ class GlobalHotkey:
     # Timing constants
     HOLD_THRESHOLD = 0.4       # seconds — above this = hold-to-talk
     DOUBLE_TAP_WINDOW = 0.5    # seconds — max gap between taps
+    # Key timestamps are time.monotonic_ns() ints; compare against these
+    HOLD_THRESHOLD_NS = int(HOLD_THRESHOLD * 1e9)
+    DOUBLE_TAP_WINDOW_NS = int(DOUBLE_TAP_WINDOW * 1e9)
     MAX_RECORD_SECONDS = 600   # 10 minutes
     WARNING_SECONDS = 540      # 9 minutes
 
@@ -81,6 +180,10 @@ class GlobalHotkey:
         self.pipeline = pipeline
         self.is_recording = False
         self._processing = False
+        # Guards the is_recording/_processing/toggle_mode transitions, which
+        # race between the tap thread, timer thread and transcription thread.
+        # Held only for the flag flips, never across recorder or UI calls.
+        self._state_lock = threading.Lock()
 
         # Configurable trigger key(s) — frozenset of macOS keycodes
         # Multiple keycodes for the same key (e.g. F5 = {96, 176} on MacBooks)
@@ -99,16 +202,48 @@ class GlobalHotkey:
 
         # Double-tap state machine
         self.toggle_mode = False
-        self.last_tap_time: float | None = None
-        self.press_start_time: float = 0.0
-        self._orphan_timer: threading.Timer | None = None
-        self._warning_timer: threading.Timer | None = None
-        self._max_timer: threading.Timer | None = None
+        self.last_tap_time: int | None = None
+        self.press_start_time: int = 0
+        # Bumped on every recording start; timers carry the value they were
+        # armed for so a late one cannot end a newer take
+        self._session = 0
+        self._timers = _Scheduler()
+        self._orphan_timer: list | None = None
+        self._warning_timer: list | None = None
+        self._max_timer: list | None = None
+
+        # One long-lived transcription worker; finished recordings queue up
+        # behind it instead of each spawning (and racing) a fresh thread.
+        # SimpleQueue: unbounded, no task tracking, put/get in C.
+        self._work_q: queue.SimpleQueue = queue.SimpleQueue()
+        self._worker = threading.Thread(
+            target=self._worker_loop, name="hotkey-transcribe", daemon=True
+        )
+        self._worker.start()
 
         # CGEventTap state
         self._tap = None
         self._run_loop_ref = None
-        self._held_modifiers: set[int] = set()
+        # Bit k set = keycode k is down, for modifiers without a device flag
+        self._held_mask = 0
+
+    @property
+    def trigger_keys(self) -> frozenset[int]:
+        return self._trigger_keys
+
+    @trigger_keys.setter
+    def trigger_keys(self, keycodes):
+        # The tap callback tests membership with one shift-and-mask on this
+        # int (bit k set = keycode k triggers) instead of hashing into a set.
+        # Both values are built first and then swapped together under the
+        # state lock; readers stay lock-free since each is one attribute load.
+        keycodes = frozenset(keycodes)
+        mask = 0
+        for kc in keycodes:
+            mask |= 1 << kc
+        with self._state_lock:
+            self._trigger_keys = keycodes
+            self._trigger_mask = mask
 
     # --- Key capture for settings UI ---
 
@@ -130,45 +265,72 @@ class GlobalHotkey:
 
     # --- CGEventTap callback ---
 
-    def _event_callback(self, proxy, event_type, event, refcon):
-        """CGEventTap callback — runs on the event tap thread."""
-        if event_type == kCGEventTapDisabledByTimeout:
+    def _event_callback(
+        self, proxy, event_type, event, refcon, *,
+        _get_field=CGEventGetIntegerValueField,
+        _get_flags=CGEventGetFlags,
+        _modifier_flags=MODIFIER_DEVICE_FLAGS,
+        _key_down=kCGEventKeyDown,
+        _key_up=kCGEventKeyUp,
+        _flags_changed=kCGEventFlagsChanged,
+        _keycode_field=kCGKeyboardEventKeycode,
+        _autorepeat_field=kCGKeyboardEventAutorepeat,
+        _disabled_by_timeout=kCGEventTapDisabledByTimeout,
+        _nx_sysdefined=NX_SYSDEFINED,
+        _nx_keycode_mask=NX_KEYCODE_MASK,
+    ):
+        """CGEventTap callback — runs on the event tap thread.
+
+        Runs for every key event system-wide, so the Quartz functions and
+        constants are bound as keyword-only defaults (fast locals, not
+        global lookups). Keyword-only keeps the positional signature that
+        PyObjC checks for the tap callback unchanged.
+        """
+        if event_type == _disabled_by_timeout:
             if self._tap:
                 CGEventTapEnable(self._tap, True)
             return event
 
-        keycode = None
-        is_press = None
-
-        if event_type in (kCGEventKeyDown, kCGEventKeyUp):
-            keycode = CGEventGetIntegerValueField(event, kCGKeyboardEventKeycode)
-            is_press = (event_type == kCGEventKeyDown)
-            is_repeat = bool(CGEventGetIntegerValueField(event, kCGKeyboardEventAutorepeat))
-            if is_repeat:
-                # Suppress repeats of trigger key, pass through others
-                if self._capture_mode or keycode in self.trigger_keys:
-                    return None
+        if event_type == _key_down or event_type == _key_up:
+            keycode = _get_field(event, _keycode_field)
+            # Nearly every key event on the system is some other key: pass
+            # it straight through on one field read and a mask test
+            is_trigger = (self._trigger_mask >> keycode) & 1
+            if not (is_trigger or self._capture_mode):
                 return event
-
-        elif event_type == kCGEventFlagsChanged:
-            keycode = CGEventGetIntegerValueField(event, kCGKeyboardEventKeycode)
-            # Determine press vs release by tracking held modifiers
-            if keycode in self._held_modifiers:
-                is_press = False
-                self._held_modifiers.discard(keycode)
+            # Suppress repeats of the trigger key (and of keys in capture mode)
+            if _get_field(event, _autorepeat_field):
+                return None
+            is_press = (event_type == _key_down)
+
+        elif event_type == _flags_changed:
+            keycode = _get_field(event, _keycode_field)
+            bit = 1 << keycode
+            held = self._held_mask
+            is_trigger = self._trigger_mask & bit
+            # Shift/ctrl/etc. during ordinary typing: only trigger modifiers
+            # (and toggle-tracked keys awaiting release) are of interest
+            if not (is_trigger or self._capture_mode or held & bit):
+                return event
+            flag = _modifier_flags.get(keycode)
+            if flag is not None:
+                # The event's own flags say whether this modifier is down
+                is_press = bool(_get_flags(event) & flag)
             else:
-                is_press = True
-                self._held_modifiers.add(keycode)
-
-        elif event_type == NX_SYSDEFINED:
+                # Caps Lock / unknown: toggle the key's held bit instead
+                self._held_mask = held ^ bit
+                is_press = not held & bit
+
+        elif event_type == _nx_sysdefined:
+            # Bridging to NSEvent is the costly part; skip it entirely unless
+            # a media key could be the trigger (or is being captured)
+            if not (self._trigger_mask & _nx_keycode_mask or self._capture_mode):
+                return event
             return self._handle_nx_event(event)
 
         else:
             return event
 
-        if keycode is None:
-            return event
-
         # Remember capture state before _on_press might change it
         was_capture = self._capture_mode
 
@@ -177,15 +339,16 @@ class GlobalHotkey:
         else:
             self._on_release(keycode)
 
-        # Suppress trigger key and capture-mode keys
-        if was_capture or keycode in self.trigger_keys:
+        # Suppress trigger key and capture-mode keys (trigger test reused
+        # from above rather than recomputed)
+        if was_capture or is_trigger:
             return None
         return event
 
-    def _handle_nx_event(self, event):
+    def _handle_nx_event(self, event, *, _ns_event_from_cg=Quartz.NSEvent.eventWithCGEvent_):
         """Handle NX_SYSDEFINED events (media/special function keys on MacBooks)."""
         try:
-            ns_event = Quartz.NSEvent.eventWithCGEvent_(event)
+            ns_event = _ns_event_from_cg(event)
             if ns_event is None:
                 return event
             if ns_event.subtype() != NX_SUBTYPE_AUX_CONTROL_BUTTONS:
@@ -201,13 +364,7 @@ class GlobalHotkey:
             if not (is_press or is_release):
                 return event
 
-            # Map NX key type to our serialized name
-            name = NX_KEYTYPE_TO_NAME.get(nx_key_type)
-            if not name:
-                return event
-
-            from config import NAME_TO_KEYCODE
-            keycode = NAME_TO_KEYCODE.get(name)
+            keycode = NX_KEYTYPE_TO_KEYCODE.get(nx_key_type)
             if keycode is None:
                 return event
 
@@ -218,7 +375,7 @@ class GlobalHotkey:
             elif is_release:
                 self._on_release(keycode)
 
-            if was_capture or keycode in self.trigger_keys:
+            if was_capture or (self._trigger_mask >> keycode) & 1:
                 return None
             return event
 
@@ -230,228 +387,202 @@ class GlobalHotkey:
     def _on_press(self, keycode):
         # Capture mode: intercept any key for settings UI
         if self._capture_mode:
-            from config import key_to_string
             serialized = key_to_string(keycode)
             if serialized:
                 self._captured_key = serialized
                 self._capture_mode = False
             return
 
-        if keycode not in self.trigger_keys:
-            return
-        if self._processing:
+        if not (self._trigger_mask >> keycode) & 1:
             return
         if not self.transcriber.is_ready:
             return
 
-        if self.toggle_mode and self.is_recording:
-            # Already in toggle-recording mode — this press is a potential stop-tap
-            self.press_start_time = time.time()
-        elif not self.is_recording:
-            # Start recording immediately (responsive for hold-to-talk)
-            self._cancel_orphan_timer()
+        with self._state_lock:
+            if self._processing:
+                return
+            if self.toggle_mode and self.is_recording:
+                # Already in toggle-recording mode — this press is a potential stop-tap
+                self.press_start_time = time.monotonic_ns()
+                return
+            if self.is_recording:
+                return
             self.is_recording = True
-            self.recorder.start()
-            self.state_manager.set_state(AppState.RECORDING)
-            self.press_start_time = time.time()
-            self._start_duration_timers()
-            # Start streaming pipeline if available
-            if self.pipeline is not None and self.pipeline.vad_available:
-                sys_chunks = self.recorder.get_sys_audio_chunks()
-                self.pipeline.start(sys_audio_chunks=sys_chunks)
-                self.recorder.on_vad_chunk = self.pipeline.feed
+            self.press_start_time = time.monotonic_ns()
+            self._session += 1
+            session = self._session
 
-    def _on_release(self, keycode):
-        if keycode not in self.trigger_keys:
+        # Start recording immediately (responsive for hold-to-talk)
+        self._cancel_orphan_timer()
+        if not self.recorder.start():
+            # The dashboard is already recording on the shared recorder
+            with self._state_lock:
+                self.is_recording = False
             return
-        if not self.is_recording:
+        self.state_manager.set_state(AppState.RECORDING)
+        self._start_duration_timers(session)
+        # Start streaming pipeline if available
+        if self.pipeline is not None and self.pipeline.vad_available:
+            sys_chunks = self.recorder.get_sys_audio_chunks()
+            self.pipeline.start(sys_audio_chunks=sys_chunks)
+            self.recorder.on_vad_chunk = self.pipeline.feed
+
+    def _on_release(self, keycode):
+        if not (self._trigger_mask >> keycode) & 1:
             return
 
-        hold_duration = time.time() - self.press_start_time
+        with self._state_lock:
+            if not self.is_recording:
+                return
 
-        if self.toggle_mode:
-            # In toggle mode — single tap to stop
-            if hold_duration < self.HOLD_THRESHOLD:
-                self.last_tap_time = None
-                self.toggle_mode = False
-                self.is_recording = False
-                self._cancel_duration_timers()
-                threading.Thread(target=self._process_recording, daemon=True).start()
-            # Hold in toggle mode — ignore (user just held the key briefly)
-        else:
-            # Not in toggle mode
-            if hold_duration >= self.HOLD_THRESHOLD:
+            now = time.monotonic_ns()
+            hold_duration = now - self.press_start_time
+            action = None
+
+            if self.toggle_mode:
+                # In toggle mode — single tap to stop
+                if hold_duration < self.HOLD_THRESHOLD_NS:
+                    self.last_tap_time = None
+                    self.toggle_mode = False
+                    action = "process"
+                # Hold in toggle mode — ignore (user just held the key briefly)
+            elif hold_duration >= self.HOLD_THRESHOLD_NS:
                 # Hold-to-talk: stop & transcribe
-                self.is_recording = False
-                self._cancel_duration_timers()
-                threading.Thread(target=self._process_recording, daemon=True).start()
+                action = "process"
+            elif (self.last_tap_time is not None
+                    and (now - self.last_tap_time) < self.DOUBLE_TAP_WINDOW_NS):
+                # Second tap within window → enter toggle mode, keep recording
+                self.last_tap_time = None
+                self.toggle_mode = True
+                action = "toggle"
             else:
-                # Short tap — check for double-tap to enter toggle mode
-                if (self.last_tap_time is not None
-                        and (time.time() - self.last_tap_time) < self.DOUBLE_TAP_WINDOW):
-                    # Second tap within window → enter toggle mode, keep recording
-                    self.last_tap_time = None
-                    self.toggle_mode = True
-                    self._cancel_orphan_timer()
-                else:
-                    # First tap — set orphan timer to cancel if no second tap
-                    self.last_tap_time = time.time()
-                    self._cancel_orphan_timer()
-                    self._orphan_timer = threading.Timer(
-                        self.DOUBLE_TAP_WINDOW, self._on_orphan_tap
-                    )
-                    self._orphan_timer.daemon = True
-                    self._orphan_timer.start()
+                # First tap — set orphan timer to cancel if no second tap
+                self.last_tap_time = now
+                action = "orphan"
+            session = self._session
+
+            if action == "process":
+                # Claim processing in the same step that ends recording, so a
+                # press racing the worker start cannot begin a new take
+                self.is_recording = False
+                self._processing = True
+
+        if action == "process":
+            self._cancel_duration_timers()
+            self._work_q.put(self._process_recording)
+        elif action == "toggle":
+            self._cancel_orphan_timer()
+        elif action == "orphan":
+            self._cancel_orphan_timer()
+            self._orphan_timer = self._timers.schedule(
+                self.DOUBLE_TAP_WINDOW, lambda: self._on_orphan_tap(session)
+            )
 
     # --- Orphan tap / timer handlers ---
 
-    def _on_orphan_tap(self):
+    def _on_orphan_tap(self, session=None):
         """Single tap with no follow-up — cancel recording."""
-        self.last_tap_time = None
-        if self.is_recording and not self.toggle_mode:
+        with self._state_lock:
+            if session is not None and session != self._session:
+                return
+            self.last_tap_time = None
+            if not self.is_recording or self.toggle_mode:
+                return
             self.is_recording = False
-            self._cancel_duration_timers()
-            if self.recorder.is_recording:
-                self.recorder.stop()  # discard audio
-            self.state_manager.set_state(AppState.IDLE)
+        self._cancel_duration_timers()
+        if self.recorder.is_recording:
+            self.recorder.discard()
+        self.state_manager.set_state(AppState.IDLE)
 
     def _cancel_orphan_timer(self):
         if self._orphan_timer is not None:
-            self._orphan_timer.cancel()
+            self._timers.cancel(self._orphan_timer)
             self._orphan_timer = None
 
     def _on_hotkey_changed(self, serialized: str):
         """Called when user changes the hotkey in settings."""
-        from config import string_to_keycodes
         new_keycodes = string_to_keycodes(serialized)
 
         # If currently recording, cancel it cleanly
-        if self.is_recording:
-            self.toggle_mode = False
-            self.is_recording = False
-            self.last_tap_time = None
+        with self._state_lock:
+            was_recording = self.is_recording
+            if was_recording:
+                self.toggle_mode = False
+                self.is_recording = False
+                self.last_tap_time = None
+        if was_recording:
             self._cancel_orphan_timer()
             self._cancel_duration_timers()
             if self.recorder.is_recording:
-                self.recorder.stop()
+                self.recorder.discard()
             self.state_manager.set_state(AppState.IDLE)
 
         self.trigger_keys = new_keycodes
 
-    def _start_duration_timers(self):
+    def _start_duration_timers(self, session=None):
         self._cancel_duration_timers()
-        self._warning_timer = threading.Timer(
+        self._warning_timer = self._timers.schedule(
             self.WARNING_SECONDS, self._on_warning
         )
-        self._warning_timer.daemon = True
-        self._warning_timer.start()
-
-        self._max_timer = threading.Timer(
-            self.MAX_RECORD_SECONDS, self._on_max_duration
+        self._max_timer = self._timers.schedule(
+            self.MAX_RECORD_SECONDS, lambda: self._on_max_duration(session)
         )
-        self._max_timer.daemon = True
-        self._max_timer.start()
 
     def _cancel_duration_timers(self):
         if self._warning_timer is not None:
-            self._warning_timer.cancel()
+            self._timers.cancel(self._warning_timer)
             self._warning_timer = None
         if self._max_timer is not None:
-            self._max_timer.cancel()
+            self._timers.cancel(self._max_timer)
             self._max_timer = None
 
     def _on_warning(self):
         self.state_manager.push_warning("Recording ends in 1 minute")
 
-    def _on_max_duration(self):
+    def _on_max_duration(self, session=None):
         """Force stop recording after max duration."""
-        if self.is_recording:
+        with self._state_lock:
+            if not self.is_recording:
+                return
+            if session is not None and session != self._session:
+                return
             self.toggle_mode = False
             self.is_recording = False
             self.last_tap_time = None
-            self._cancel_duration_timers()
-            threading.Thread(target=self._process_recording, daemon=True).start()
+            self._processing = True
+        self._cancel_duration_timers()
+        self._work_q.put(self._process_recording)
+
+    def _worker_loop(self):
+        while True:
+            fn = self._work_q.get()
+            try:
+                fn()
+            except Exception as e:
+                print(f"Hotkey worker error: {e}")
 
     def _process_recording(self):
         """Stop recording, transcribe, copy to clipboard."""
         self._processing = True
         self.state_manager.set_state(AppState.PROCESSING)
         try:
-            use_streaming = (
-                self.pipeline is not None
-                and self.pipeline.vad_available
-                and self.pipeline._active
+            text, elapsed, audio_duration = stop_and_transcribe(
+                self.recorder, self.transcriber, self.pipeline
             )
-
-            if use_streaming:
-                self.recorder.on_vad_chunk = None
-                mic_audio, sys_audio = self.recorder.stop_raw()
-
-                if mic_audio is None or len(mic_audio) == 0:
-                    self.pipeline.stop(None)
-                    self.state_manager.set_state(AppState.IDLE)
-                    return
-
-                audio_duration = round(len(mic_audio) / self.recorder.sample_rate, 2)
-
-                if audio_duration < self.pipeline.SHORT_RECORDING_THRESHOLD_S:
-                    # Short recording — single-pass with tuned params
-                    self.pipeline.stop(None)
-                    if sys_audio is not None and len(sys_audio) > 0:
-                        try:
-                            from aec import nlms_echo_cancel, noise_gate
-                            mic_audio = nlms_echo_cancel(mic_audio, sys_audio)
-                            mic_audio = noise_gate(mic_audio, sample_rate=self.recorder.sample_rate)
-                        except Exception:
-                            pass
-                    del sys_audio
-                    start_time = time.time()
-                    text = self.transcriber.transcribe_array(mic_audio)
-                    elapsed = round(time.time() - start_time, 2)
-                    del mic_audio
-                else:
-                    # Streaming path — pipeline already transcribed intermediate segments
-                    del mic_audio
-                    start_time = time.time()
-                    results = self.pipeline.stop(sys_audio)
-                    elapsed = round(time.time() - start_time, 2)
-                    del sys_audio
-                    text = " ".join(r.text for r in results if r.text)
-
-                if text:
-                    copy_to_clipboard(text)
-                    paste_clipboard()
-                    if self.history:
-                        self.history.add(text, duration=audio_duration, latency=elapsed)
-                gc.collect()
-                self.state_manager.set_state(AppState.IDLE)
-            else:
-                # Original single-pass flow
-                wav_path = self.recorder.stop()
-                if not wav_path:
-                    self.state_manager.set_state(AppState.IDLE)
-                    return
-                audio_duration = round(get_wav_duration(wav_path), 2)
-                start_time = time.time()
-                text = self.transcriber.transcribe(wav_path)
-                elapsed = round(time.time() - start_time, 2)
-                if text:
-                    copy_to_clipboard(text)
-                    paste_clipboard()
-                    if self.history:
-                        self.history.add(text, duration=audio_duration, latency=elapsed)
-                try:
-                    os.unlink(wav_path)
-                except OSError:
-                    pass
-                gc.collect()
-                self.state_manager.set_state(AppState.IDLE)
+            if text:
+                copy_to_clipboard(text)
+                paste_clipboard()
+                if self.history:
+                    self.history.add(text, duration=audio_duration, latency=elapsed)
+            gc.collect()
+            self.state_manager.set_state(AppState.IDLE)
         except Exception as e:
             print(f"Hotkey transcription error: {e}")
             self.state_manager.set_state(AppState.ERROR)
-            threading.Timer(1.0, lambda: self.state_manager.set_state(AppState.IDLE)).start()
+            self._timers.schedule(1.0, lambda: self.state_manager.set_state(AppState.IDLE))
         finally:
-            self._processing = False
+            with self._state_lock:
+                self._processing = False
 
     # --- Lifecycle ---
 
@@ -461,19 +592,12 @@ class GlobalHotkey:
         Tries active tap first (can suppress system key actions like dictation).
         Falls back to listen-only tap if Accessibility permission is missing.
         """
-        event_mask = (
-            (1 << kCGEventKeyDown)
-            | (1 << kCGEventKeyUp)
-            | (1 << kCGEventFlagsChanged)
-            | (1 << NX_SYSDEFINED)
-        )
-
         # Try active tap first (requires Accessibility permission)
         self._tap = CGEventTapCreate(
             kCGHIDEventTap,
             kCGHeadInsertEventTap,
             kCGEventTapOptionDefault,
-            event_mask,
+            TAP_EVENT_MASK,
             self._event_callback,
             None,
         )
@@ -487,7 +611,7 @@ class GlobalHotkey:
                 kCGHIDEventTap,
                 kCGHeadInsertEventTap,
                 Quartz.kCGEventTapOptionListenOnly,
-                event_mask,
+                TAP_EVENT_MASK,
                 self._event_callback,
                 None,
             )
@@ -505,12 +629,24 @@ class GlobalHotkey:
                 )
                 return
 
+        # Quartz is already loaded here; build the paste events up front so
+        # the first dictation's paste is just two CGEventPost calls
+        prepare_paste()
+
         source = CFMachPortCreateRunLoopSource(kCFAllocatorDefault, self._tap, 0)
-        thread = threading.Thread(target=self._run_tap, args=(source,), daemon=True)
+        thread = threading.Thread(
+            target=self._run_tap, args=(source,), name="hotkey-tap", daemon=True,
+        )
         thread.start()
 
     def _run_tap(self, source):
-        """Run the event tap's CFRunLoop (blocks until stopped)."""
+        """Run the event tap's CFRunLoop (blocks until stopped).
+
+        This thread does nothing but service the tap, at user-interactive
+        QoS, so key callbacks are not starved when the main thread is busy
+        and macOS does not disable the tap for timing out.
+        """
+        _raise_thread_qos(b"WhisperDash hotkey tap")
         self._run_loop_ref = CFRunLoopGetCurrent()
         CFRunLoopAddSource(self._run_loop_ref, source, kCFRunLoopCommonModes)
         CGEventTapEnable(self._tap, True)
@@ -525,3 +661,15 @@ class GlobalHotkey:
             self._run_loop_ref = None
         self._cancel_orphan_timer()
         self._cancel_duration_timers()
+
+
+def _raise_thread_qos(name: bytes):
+    """Name the calling thread and move it to user-interactive QoS."""
+    try:
+        libsystem = ctypes.CDLL("/usr/lib/libSystem.dylib")
+        libsystem.pthread_setname_np(ctypes.c_char_p(name))
+        err = libsystem.pthread_set_qos_class_self_np(QOS_CLASS_USER_INTERACTIVE, 0)
+        if err:
+            print(f"Could not raise hotkey thread QoS (error {err})")
+    except (OSError, AttributeError) as e:
+        print(f"Could not raise hotkey thread QoS: {e}")
@@ -1,19 +1,23 @@
 # main.py
+import atexit
 import os
 import sys
 import threading
 
 # Fix SSL certificates in py2app bundle.
-# __boot__.py sets SSL_CERT_FILE to a non-existent path; point it at certifi's CA bundle.
+# __boot__.py sets SSL_CERT_FILE to a non-existent path; point it at the
+# certifi CA bundle that setup.py copies into Resources. certifi itself is
+# only imported if that copy is missing.
 if getattr(sys, 'frozen', None) == 'macosx_app':
-    import certifi
-    os.environ['SSL_CERT_FILE'] = certifi.where()
+    _ca_file = os.path.join(os.environ.get('RESOURCEPATH', '.'), 'cacert.pem')
+    if not os.path.isfile(_ca_file):
+        import certifi
+        _ca_file = certifi.where()
+    os.environ['SSL_CERT_FILE'] = _ca_file
     os.environ.pop('SSL_CERT_DIR', None)
 
 import objc
 import AppKit
-import uvicorn
-import webview
 
 from app import create_app
 from recorder import AudioRecorder
@@ -23,6 +27,7 @@ from pipeline import StreamingPipeline
 from state import AppState, AppStateManager
 from history import TranscriptionHistory
 from config import SettingsManager
+from permissions import observe_ax_trust
 
 HOST = "127.0.0.1"
 PORT = 8765
@@ -31,72 +36,117 @@ _app_quitting = False
 # Bar dimensions per state
 BAR_IDLE_W, BAR_IDLE_H = 120, 24
 BAR_ACTIVE_W, BAR_ACTIVE_H = 280, 40
+# Trailing delay that folds rapid state changes into one bar resize
+BAR_RESIZE_DEBOUNCE_S = 0.03
 
 
 def start_server(app):
-    uvicorn.run(app, host=HOST, port=PORT, log_level="warning")
+    # Imported here, on the server thread, so it overlaps main-thread setup
+    import uvicorn
+
+    # uvloop + httptools (both from uvicorn[standard]) for the event loop and
+    # HTTP parsing. Frames on /ws and /ws/bar are tiny, so per-message
+    # deflate costs more CPU than it saves on loopback.
+    uvicorn.run(
+        app, host=HOST, port=PORT, log_level="warning",
+        loop="uvloop", http="httptools", ws="websockets",
+        ws_per_message_deflate=False, ws_max_size=2 ** 20,
+    )
+
+
+# Main screen (width, height), cached until macOS reports a display change
+_screen_size = None
+_screen_observer = None
+
+
+def _invalidate_screen_size(_notification):
+    global _screen_size
+    _screen_size = None
+
+
+def _main_screen_size():
+    """Return the main screen size, querying NSScreen only after a change."""
+    global _screen_size, _screen_observer
+    if _screen_size is not None:
+        return _screen_size
+    frame = AppKit.NSScreen.mainScreen().frame()
+    size = (int(frame.size.width), int(frame.size.height))
+    if _screen_observer is None:
+        _screen_observer = (
+            AppKit.NSNotificationCenter.defaultCenter()
+            .addObserverForName_object_queue_usingBlock_(
+                AppKit.NSApplicationDidChangeScreenParametersNotification,
+                None, None, _invalidate_screen_size,
+            )
+        )
+    _screen_size = size
+    return size
 
 
 def get_bar_position(width, height):
     """Center horizontally, 70px above screen bottom."""
-    try:
-        import AppKit
-        screen = AppKit.NSScreen.mainScreen()
-        frame = screen.frame()
-        screen_w = int(frame.size.width)
-        screen_h = int(frame.size.height)
-    except ImportError:
-        screen_w, screen_h = 1440, 900
+    screen_w, screen_h = _main_screen_size()
     x = (screen_w - width) // 2
     y = screen_h - 70 - height
     return x, y
 
 
 
-def _setup_dock_menu(main_window):
-    """Add 'Open Dashboard' and 'Quit' to the macOS dock right-click menu."""
+# Dashboard window reopened from the dock menu; set by _setup_dock_menu
+_main_window = None
+
+
+def _patch_app_delegate():
+    """Replace pywebview's AppDelegate with a subclass that adds the dock menu.
+
+    Must run before the first window is created: pywebview instantiates
+    BrowserView.AppDelegate when it builds each window.
+    """
     import webview.platforms.cocoa as cocoa_backend
 
-    AppDelegate = cocoa_backend.BrowserView.AppDelegate
+    class _DockMenuDelegate(cocoa_backend.BrowserView.AppDelegate):
+        def applicationDockMenu_(self, sender):
+            menu = AppKit.NSMenu.alloc().init()
+            dash_item = AppKit.NSMenuItem.alloc().initWithTitle_action_keyEquivalent_(
+                "Open Dashboard", "openDashboard:", "",
+            )
+            dash_item.setTarget_(self)
+            menu.addItem_(dash_item)
 
-    def applicationDockMenu_(self, sender):
-        menu = AppKit.NSMenu.alloc().init()
-        dash_item = AppKit.NSMenuItem.alloc().initWithTitle_action_keyEquivalent_(
-            "Open Dashboard", "openDashboard:", "",
-        )
-        dash_item.setTarget_(self)
-        menu.addItem_(dash_item)
+            menu.addItem_(AppKit.NSMenuItem.separatorItem())
 
-        menu.addItem_(AppKit.NSMenuItem.separatorItem())
+            quit_item = AppKit.NSMenuItem.alloc().initWithTitle_action_keyEquivalent_(
+                "Quit WhisperDash", "quitApp:", "",
+            )
+            quit_item.setTarget_(self)
+            menu.addItem_(quit_item)
+            return menu
 
-        quit_item = AppKit.NSMenuItem.alloc().initWithTitle_action_keyEquivalent_(
-            "Quit WhisperDash", "quitApp:", "",
-        )
-        quit_item.setTarget_(self)
-        menu.addItem_(quit_item)
-        return menu
+        def openDashboard_(self, sender):
+            if _main_window is not None:
+                _main_window.show()
 
-    def openDashboard_(self, sender):
-        main_window.show()
+        def quitApp_(self, sender):
+            global _app_quitting
+            _app_quitting = True
+            AppKit.NSApplication.sharedApplication().terminate_(None)
 
-    def quitApp_(self, sender):
-        global _app_quitting
-        _app_quitting = True
-        AppKit.NSApplication.sharedApplication().terminate_(None)
+        # Override pywebview's applicationShouldTerminate: so standard Quit works
+        # too. The original checks window.events.closing on every window, but our
+        # main window closing handler returns False (to hide instead of close),
+        # which blocks quit.
+        def applicationShouldTerminate_(self, app):
+            global _app_quitting
+            _app_quitting = True
+            return AppKit.NSTerminateNow
 
-    objc.classAddMethod(AppDelegate, b"applicationDockMenu:", applicationDockMenu_)
-    objc.classAddMethod(AppDelegate, b"openDashboard:", openDashboard_)
-    objc.classAddMethod(AppDelegate, b"quitApp:", quitApp_)
+    cocoa_backend.BrowserView.AppDelegate = _DockMenuDelegate
 
-    # Replace pywebview's applicationShouldTerminate: so standard Quit works too.
-    # The original checks window.events.closing on every window, but our main window
-    # closing handler returns False (to hide instead of close), which blocks quit.
-    def applicationShouldTerminate_(self, app):
-        global _app_quitting
-        _app_quitting = True
-        return AppKit.NSTerminateNow
 
-    AppDelegate.applicationShouldTerminate_ = applicationShouldTerminate_
+def _setup_dock_menu(main_window):
+    """Point the dock menu's 'Open Dashboard' item at the main window."""
+    global _main_window
+    _main_window = main_window
 
 
 def _patch_window_host_as_panel():
@@ -142,17 +192,24 @@ def _configure_bar_window(bar_window):
         return
 
     nswindow.setLevel_(AppKit.NSStatusWindowLevel)
-    nswindow.setHidesOnDeactivate_(False)
+
+    # _PanelHost already applies the rest at init; re-apply only what
+    # pywebview may have changed since. A style-mask write rebuilds the
+    # window's frame view, so it is skipped when the bit is already set.
+    if nswindow.hidesOnDeactivate():
+        nswindow.setHidesOnDeactivate_(False)
 
     # NonactivatingPanel: clicking the bar won't steal focus from the full-screen app
-    mask = nswindow.styleMask() | (1 << 7)  # NSWindowStyleMaskNonactivatingPanel
-    nswindow.setStyleMask_(mask)
+    mask = nswindow.styleMask()
+    if not mask & (1 << 7):  # NSWindowStyleMaskNonactivatingPanel
+        nswindow.setStyleMask_(mask | (1 << 7))
 
     behavior = (
         1 << 0   # NSWindowCollectionBehaviorCanJoinAllSpaces
         | 1 << 8  # NSWindowCollectionBehaviorFullScreenAuxiliary
     )
-    nswindow.setCollectionBehavior_(behavior)
+    if nswindow.collectionBehavior() != behavior:
+        nswindow.setCollectionBehavior_(behavior)
 
 
 def _configure_main_window(main_window):
@@ -175,10 +232,17 @@ def main():
     transcriber = WhisperTranscriber()
     state_manager = AppStateManager()
     history = TranscriptionHistory()
+    # Commit any write-behind history rows on quit
+    atexit.register(history.close)
     settings = SettingsManager()
     pipeline = StreamingPipeline(transcriber)
 
+    # One recorder for the dashboard and the hotkey: a single CoreAudio
+    # stream, claimed by whichever starts recording first
+    recorder = AudioRecorder()
+
     app = create_app(
+        recorder=recorder,
         transcriber=transcriber,
         state_manager=state_manager,
         history=history,
@@ -186,11 +250,17 @@ def main():
         pipeline=pipeline,
     )
 
-    # Global hotkey uses its own recorder to avoid conflicts with the UI
-    hotkey_recorder = AudioRecorder()
-    hotkey_recorder.on_amplitude = state_manager.push_amplitude
+    # Start serving first: the app lifespan kicks off model warmup, which
+    # then runs while the hotkey and windows are set up below
+    server_thread = threading.Thread(
+        target=start_server,
+        args=(app,),
+        daemon=True,
+    )
+    server_thread.start()
+
     hotkey = GlobalHotkey(
-        recorder=hotkey_recorder,
+        recorder=recorder,
         transcriber=transcriber,
         state_manager=state_manager,
         history=history,
@@ -207,15 +277,13 @@ def main():
             "If WhisperDash is already listed, toggle it OFF then ON."
         )
 
-    server_thread = threading.Thread(
-        target=start_server,
-        args=(app,),
-        daemon=True,
-    )
-    server_thread.start()
+    # pywebview (and its Cocoa backend) is only needed from here on
+    import webview
 
     # Use NSPanel instead of NSWindow so the bar can float above full-screen apps
     _patch_window_host_as_panel()
+    # Dock menu methods live on an AppDelegate subclass, built once here
+    _patch_app_delegate()
 
     # Calculate bar position
     bar_x, bar_y = get_bar_position(BAR_IDLE_W, BAR_IDLE_H)
@@ -248,25 +316,52 @@ def main():
     # Store reference so /api/browse-file can open a file dialog
     app.state.main_window = main_window
 
+    # Bar resizes go to the window server, so a burst of state changes
+    # (e.g. a false-start tap) is collapsed into one trailing resize, and
+    # nothing is sent when the bar already has the target size.
+    bar_size = (BAR_IDLE_W, BAR_IDLE_H)
+    resize_timer = None
+    resize_lock = threading.Lock()
+
+    def apply_bar_size(size):
+        nonlocal bar_size
+        bar_size = size
+        cx, cy = get_bar_position(*size)
+        nswindow = bar_window.native
+        if nswindow is None:
+            bar_window.resize(*size)
+            bar_window.move(cx, cy)
+            return
+        # pywebview's resize() and move() each hop to the main thread and
+        # wait; set the whole frame in one main-queue block instead. Cocoa
+        # frames are bottom-left based: the bar sits 70px above the bottom.
+        frame = AppKit.NSMakeRect(cx, _main_screen_size()[1] - cy - size[1], *size)
+        AppKit.NSOperationQueue.mainQueue().addOperationWithBlock_(
+            lambda: nswindow.setFrame_display_(frame, True)
+        )
+
+    def set_bar_size(width, height, delay=BAR_RESIZE_DEBOUNCE_S):
+        nonlocal resize_timer
+        with resize_lock:
+            if resize_timer is not None:
+                resize_timer.cancel()
+                resize_timer = None
+            if (width, height) == bar_size:
+                return
+            resize_timer = threading.Timer(delay, apply_bar_size, args=((width, height),))
+            resize_timer.daemon = True
+            resize_timer.start()
+
     # Handle bar resize based on state changes
     def on_state_change(old_state, new_state):
         if new_state == AppState.RECORDING or new_state == AppState.PROCESSING:
-            cx, cy = get_bar_position(BAR_ACTIVE_W, BAR_ACTIVE_H)
-            bar_window.resize(BAR_ACTIVE_W, BAR_ACTIVE_H)
-            bar_window.move(cx, cy)
+            set_bar_size(BAR_ACTIVE_W, BAR_ACTIVE_H)
         elif new_state == AppState.IDLE:
-            cx, cy = get_bar_position(BAR_IDLE_W, BAR_IDLE_H)
-            bar_window.resize(BAR_IDLE_W, BAR_IDLE_H)
-            bar_window.move(cx, cy)
+            set_bar_size(BAR_IDLE_W, BAR_IDLE_H)
         elif new_state == AppState.ERROR:
-            # Stay at active size briefly, then shrink
-            def shrink():
-                import time
-                time.sleep(1.0)
-                cx, cy = get_bar_position(BAR_IDLE_W, BAR_IDLE_H)
-                bar_window.resize(BAR_IDLE_W, BAR_IDLE_H)
-                bar_window.move(cx, cy)
-            threading.Thread(target=shrink, daemon=True).start()
+            # Stay at active size briefly, then shrink. Shares the resize
+            # timer, so a newer state change cancels the pending shrink.
+            set_bar_size(BAR_IDLE_W, BAR_IDLE_H, delay=1.0)
 
     state_manager.on_state_change(on_state_change)
 
@@ -284,6 +379,10 @@ def main():
         _configure_bar_window(bar_window)
         _configure_main_window(main_window)
 
+    # Accessibility trust changes arrive via the main thread's run loop,
+    # which AppKit runs from here on
+    observe_ax_trust()
+
     webview.start(func=_on_start)
 
 
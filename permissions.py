@@ -1,6 +1,90 @@
 # permissions.py
 """macOS permission checks via PyObjC."""
 import subprocess
+import time
+
+# Framework functions are resolved once at import; the onboarding screen
+# polls check_permissions(), so it should not re-import them per call.
+try:
+    from ApplicationServices import AXIsProcessTrusted as _ax_is_trusted
+except Exception:
+    _ax_is_trusted = None
+
+try:
+    import AVFoundation as _avf
+except Exception:
+    _avf = None
+
+try:
+    from Quartz import CGPreflightScreenCaptureAccess as _preflight_screen_capture
+except Exception:
+    _preflight_screen_capture = None
+
+try:
+    from AppKit import NSWorkspace as _NSWorkspace
+    from Foundation import NSURL as _NSURL
+except Exception:
+    _NSWorkspace = None
+
+
+# Cached AXIsProcessTrusted() result. Only a granted result is cached, and
+# only once observe_ax_trust() has registered on the main thread: macOS posts
+# the trust-list change as a distributed notification, which clears the
+# cache. The notification can arrive before AXIsProcessTrusted() flips, so
+# nothing is cached for a short settle period after it.
+_AX_SETTLE_S = 2.0
+_ax_cached = None
+_ax_changed_at = None
+_ax_observing = False
+
+
+def _on_ax_trust_changed(center, observer, name, obj, info):
+    global _ax_cached, _ax_changed_at
+    _ax_cached = None
+    _ax_changed_at = time.monotonic()
+
+
+def observe_ax_trust() -> bool:
+    """Register for trust-list changes once. Returns True when registered.
+
+    Call from the main thread at startup: the notification is delivered
+    through the registering thread's run loop, and only the main thread
+    runs one (check_permissions() is called from the server's event loop).
+    """
+    global _ax_observing
+    if not _ax_observing:
+        try:
+            from CoreFoundation import (
+                CFNotificationCenterAddObserver,
+                CFNotificationCenterGetDistributedCenter,
+                CFNotificationSuspensionBehaviorDeliverImmediately,
+            )
+            CFNotificationCenterAddObserver(
+                CFNotificationCenterGetDistributedCenter(),
+                None,
+                _on_ax_trust_changed,
+                "com.apple.accessibility.api",
+                None,
+                CFNotificationSuspensionBehaviorDeliverImmediately,
+            )
+            _ax_observing = True
+        except Exception:
+            pass
+    return _ax_observing
+
+
+def _accessibility_granted() -> bool:
+    global _ax_cached
+    if _ax_cached is not None:
+        return _ax_cached
+    granted = bool(_ax_is_trusted())
+    settled = (
+        _ax_changed_at is None
+        or time.monotonic() - _ax_changed_at >= _AX_SETTLE_S
+    )
+    if granted and settled and _ax_observing:
+        _ax_cached = True
+    return granted
 
 
 def check_permissions() -> dict:
@@ -9,8 +93,7 @@ def check_permissions() -> dict:
 
     # Accessibility — AXIsProcessTrusted()
     try:
-        from ApplicationServices import AXIsProcessTrusted
-        ax_granted = AXIsProcessTrusted()
+        ax_granted = _accessibility_granted()
     except Exception:
         ax_granted = False
 
@@ -25,9 +108,8 @@ def check_permissions() -> dict:
     # Microphone — AVCaptureDevice.authorizationStatusForMediaType_
     # 0 = notDetermined, 1 = restricted, 2 = denied, 3 = authorized
     try:
-        import AVFoundation
-        status = AVFoundation.AVCaptureDevice.authorizationStatusForMediaType_(
-            AVFoundation.AVMediaTypeAudio
+        status = _avf.AVCaptureDevice.authorizationStatusForMediaType_(
+            _avf.AVMediaTypeAudio
         )
         mic_granted = (status == 3)
         mic_not_determined = (status == 0)
@@ -46,8 +128,7 @@ def check_permissions() -> dict:
 
     # Screen Recording — CGPreflightScreenCaptureAccess()
     try:
-        from Quartz import CGPreflightScreenCaptureAccess
-        screen_granted = CGPreflightScreenCaptureAccess()
+        screen_granted = _preflight_screen_capture()
     except Exception:
         screen_granted = False
 
@@ -65,9 +146,8 @@ def check_permissions() -> dict:
 def request_microphone_access():
     """Trigger the native macOS microphone permission prompt."""
     try:
-        import AVFoundation
-        AVFoundation.AVCaptureDevice.requestAccessForMediaType_completionHandler_(
-            AVFoundation.AVMediaTypeAudio,
+        _avf.AVCaptureDevice.requestAccessForMediaType_completionHandler_(
+            _avf.AVMediaTypeAudio,
             lambda granted: None,
         )
     except Exception:
@@ -75,8 +155,15 @@ def request_microphone_access():
 
 
 def open_system_settings(url: str):
-    """Open a System Settings pane via URL scheme."""
+    """Open a System Settings pane via URL scheme.
+
+    Goes through NSWorkspace in-process; `open` is only forked without AppKit.
+    """
     try:
+        if _NSWorkspace is not None:
+            nsurl = _NSURL.URLWithString_(url)
+            if nsurl is not None and _NSWorkspace.sharedWorkspace().openURL_(nsurl):
+                return
         subprocess.Popen(["open", url])
     except Exception:
         pass
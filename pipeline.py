@@ -1,12 +1,15 @@
 # pipeline.py
 """Streaming transcription pipeline: VAD segmentation + overlapped AEC/transcription."""
+import bisect
 import queue
 import threading
+import time
 from dataclasses import dataclass
 from typing import Optional
 
 import numpy as np
 
+from aec import estimate_echo_path, fdaf_echo_cancel, nlms_echo_cancel, noise_gate
 from vad import SileroVAD, VADSegmenter, SealedSegment
 
 
@@ -32,19 +35,34 @@ class StreamingPipeline:
     """
 
     SHORT_RECORDING_THRESHOLD_S = 5.0
-
-    def __init__(self, transcriber, sample_rate: int = 16000):
+    # Segments already waiting when the worker frees up are transcribed in
+    # one call, up to this many segments / seconds (Whisper's 30 s window)
+    MAX_BATCH_SEGMENTS = 4
+    MAX_BATCH_S = 30.0
+    # Silence inserted between batched segments, so Whisper hears a pause
+    # instead of words from separate utterances running together
+    BATCH_GAP_S = 0.3
+
+    def __init__(self, transcriber, sample_rate: int = 16000, use_fdaf: bool = True):
         self.transcriber = transcriber
         self.sample_rate = sample_rate
+        # Segment AEC: frequency-domain filter (converges within short VAD
+        # segments on broadband audio) or the time-domain block NLMS
+        self.use_fdaf = use_fdaf
 
         self._vad = SileroVAD(threshold=0.5)
         self._vad_loaded = False
 
         self._segmenter: Optional[VADSegmenter] = None
         self._worker_thread: Optional[threading.Thread] = None
-        self._results: list[SegmentResult] = []
-        self._results_lock = threading.Lock()
+        # Audio chunks handed from the recorder callback to the VAD thread
+        self._feed_q: Optional[queue.SimpleQueue] = None
+        self._vad_thread: Optional[threading.Thread] = None
+        # Keyed by segment index; a dict store is atomic, so no lock is needed
+        self._results: dict[int, SegmentResult] = {}
         self._sys_audio_chunks: Optional[list[np.ndarray]] = None
+        # Cumulative end sample of each system audio chunk seen so far
+        self._sys_chunk_ends: list[int] = []
         self._active = False
 
     def load_vad(self):
@@ -69,25 +87,76 @@ class StreamingPipeline:
         """
         if not self.vad_available:
             return
+        if self._active:
+            # The previous take was discarded without stop()
+            self._abandon()
 
         self._sys_audio_chunks = sys_audio_chunks
-        self._results = []
+        self._sys_chunk_ends = []
+        self._results = {}
         self._segmenter = VADSegmenter(self._vad, self.sample_rate)
+        self._feed_q = queue.SimpleQueue()
         self._active = True
 
+        self._vad_thread = threading.Thread(
+            target=self._vad_loop,
+            args=(self._feed_q, self._segmenter),
+            daemon=True,
+            name="pipeline-vad",
+        )
+        self._vad_thread.start()
+
         self._worker_thread = threading.Thread(
             target=self._worker_loop,
+            args=(self._segmenter.segment_queue, self._results),
             daemon=True,
+            name="pipeline-worker",
         )
         self._worker_thread.start()
 
     def feed(self, chunk: np.ndarray):
-        """Feed audio chunk to the VAD segmenter.
+        """Queue an audio chunk for the VAD segmenter.
+
+        Called from the sounddevice callback thread, which only enqueues:
+        VAD inference runs on the pipeline's VAD thread, so it never stalls
+        the audio callback. `chunk` must not be reused by the caller.
+        """
+        if self._active and self._feed_q is not None:
+            self._feed_q.put(chunk)
+
+    def _vad_loop(self, feed_q: queue.SimpleQueue, segmenter: VADSegmenter):
+        """VAD thread: run queued chunks through the segmenter until sentinel."""
+        while True:
+            chunk = feed_q.get()
+            if chunk is None:  # Sentinel
+                break
+            try:
+                segmenter.feed(chunk)
+            except Exception as e:
+                print(f"VAD feed failed: {e}")
+
+    def _abandon(self):
+        """End the active session without transcribing what it captured.
 
-        Called from the sounddevice callback thread.
+        The session's threads block on their queues until a sentinel, so a
+        take that never reaches stop() must be shut down here, or the next
+        start() would strand them along with the old segmenter's audio.
         """
-        if self._active and self._segmenter is not None:
-            self._segmenter.feed(chunk)
+        self._active = False
+        segmenter = self._segmenter
+        # Skip the untranscribed backlog; the VAD thread shares the model
+        # with the next session, so wait for it to exit
+        _drain(self._feed_q)
+        self._feed_q.put(None)
+        if self._vad_thread is not None:
+            self._vad_thread.join(timeout=10)
+        _drain(segmenter.segment_queue)
+        segmenter.signal_done()
+
+        self._segmenter = None
+        self._worker_thread = None
+        self._feed_q = None
+        self._vad_thread = None
 
     def stop(self, sys_audio: Optional[np.ndarray]) -> list[SegmentResult]:
         """Stop the pipeline and return ordered results.
@@ -102,6 +171,12 @@ class StreamingPipeline:
         if not self._active or self._segmenter is None:
             return []
 
+        # Let the VAD thread segment every chunk fed so far; the worker is
+        # still waiting for segments while this drains
+        if self._vad_thread is not None:
+            self._feed_q.put(None)
+            self._vad_thread.join(timeout=10)
+
         self._active = False
 
         # Seal the final segment
@@ -119,34 +194,64 @@ class StreamingPipeline:
         if final_segment is not None:
             result = self._process_segment(final_segment, sys_audio)
             if result is not None:
-                with self._results_lock:
-                    self._results.append(result)
+                self._results[result.segment_index] = result
 
-        with self._results_lock:
-            results = sorted(self._results, key=lambda r: r.segment_index)
+        # copy() is a single atomic operation, safe even if a timed-out
+        # worker is still storing
+        collected = self._results.copy()
+        results = [collected[i] for i in sorted(collected)]
 
         self._segmenter = None
         self._worker_thread = None
+        self._feed_q = None
+        self._vad_thread = None
         return results
 
-    def _worker_loop(self):
-        """Worker thread: dequeue sealed segments and transcribe them."""
-        while True:
-            try:
-                segment = self._segmenter.segment_queue.get(timeout=0.1)
-            except queue.Empty:
-                if not self._active:
+    def _worker_loop(
+        self,
+        segment_queue: queue.SimpleQueue,
+        results: Optional[dict[int, SegmentResult]] = None,
+    ):
+        """Worker thread: dequeue sealed segments and transcribe them.
+
+        Blocks on the queue (no polling wake-ups) until stop() queues the
+        sentinel via signal_done(). Results go to its own session's dict, so
+        an abandoned worker never writes into a newer session.
+        """
+        if results is None:
+            results = self._results
+        max_samples = int(self.MAX_BATCH_S * self.sample_rate)
+        gap = int(self.BATCH_GAP_S * self.sample_rate)
+        segment = segment_queue.get()
+        done = segment is None  # Sentinel
+        while not done:
+            # Take whatever else is already queued (never wait for more):
+            # each transcribe call has fixed setup cost, so a backlog of
+            # short segments is cheaper as one consecutive stretch of audio
+            batch = [segment]
+            total = len(segment.mic_audio)
+            segment = None
+            while len(batch) < self.MAX_BATCH_SEGMENTS:
+                try:
+                    nxt = segment_queue.get_nowait()
+                except queue.Empty:
                     break
-                continue
-
-            if segment is None:  # Sentinel
-                break
+                if nxt is None:
+                    done = True
+                    break
+                if total + gap + len(nxt.mic_audio) > max_samples:
+                    segment = nxt  # Starts the next batch
+                    break
+                batch.append(nxt)
+                total += gap + len(nxt.mic_audio)
 
-            sys_audio = self._get_sys_audio_snapshot()
-            result = self._process_segment(segment, sys_audio)
+            result = self._transcribe_batch(batch)
             if result is not None:
-                with self._results_lock:
-                    self._results.append(result)
+                results[result.segment_index] = result
+
+            if not done and segment is None:
+                segment = segment_queue.get()
+                done = segment is None
 
     def _process_segment(
         self,
@@ -154,29 +259,73 @@ class StreamingPipeline:
         sys_audio: Optional[np.ndarray],
     ) -> Optional[SegmentResult]:
         """Apply AEC to a segment, then transcribe it."""
-        mic = segment.mic_audio
-
+        ref = None
         if sys_audio is not None and len(sys_audio) > 0:
-            try:
-                from aec import nlms_echo_cancel, noise_gate
+            ref = self._align_sys_audio(
+                sys_audio, segment.start_sample, segment.end_sample
+            )
+        return self._transcribe_segment(segment, ref)
 
-                ref = self._align_sys_audio(
-                    sys_audio, segment.start_sample, segment.end_sample
-                )
-                if ref is not None and len(ref) > 0:
-                    mic = nlms_echo_cancel(mic, ref)
-                    mic = noise_gate(mic, sample_rate=self.sample_rate)
+    def _transcribe_batch(self, segments: list[SealedSegment]) -> Optional[SegmentResult]:
+        """Clean consecutive segments and transcribe them in a single call.
+
+        Segments are separated by BATCH_GAP_S of silence. The result carries
+        the first segment's index, so ordering by index is unchanged, and its
+        duration counts segment audio only.
+        """
+        if len(segments) == 1:
+            segment = segments[0]
+            ref = self._sys_audio_window(segment.start_sample, segment.end_sample)
+            return self._transcribe_segment(segment, ref)
+
+        gap = int(self.BATCH_GAP_S * self.sample_rate)
+        n_samples = sum(len(s.mic_audio) for s in segments)
+        audio = np.zeros(n_samples + gap * (len(segments) - 1), dtype=np.float32)
+        pos = 0
+        for s in segments:
+            cleaned = self._cancel_echo(
+                s.mic_audio, self._sys_audio_window(s.start_sample, s.end_sample)
+            )
+            audio[pos:pos + len(cleaned)] = cleaned
+            pos += len(cleaned) + gap
+        return self._transcribe_audio(segments[0].segment_index, audio, n_samples)
+
+    def _transcribe_segment(
+        self,
+        segment: SealedSegment,
+        ref: Optional[np.ndarray],
+    ) -> Optional[SegmentResult]:
+        """Cancel the echo of `ref` (already aligned) from a segment, then transcribe it."""
+        mic = self._cancel_echo(segment.mic_audio, ref)
+        return self._transcribe_audio(segment.segment_index, mic, len(segment.mic_audio))
+
+    def _cancel_echo(self, mic: np.ndarray, ref: Optional[np.ndarray]) -> np.ndarray:
+        """Remove the echo of `ref` from segment audio; raw audio on failure."""
+        if ref is not None and len(ref) > 0:
+            try:
+                if self.use_fdaf:
+                    mic = fdaf_echo_cancel(mic, ref)
+                else:
+                    # Segments are short: start from a least-squares echo
+                    # path estimate and use a variable step to converge fast
+                    mic = nlms_echo_cancel(
+                        mic, ref, vss=True, w_init=estimate_echo_path(mic, ref),
+                    )
+                mic = noise_gate(mic, sample_rate=self.sample_rate)
             except Exception as e:
                 print(f"Segment AEC failed, using raw audio: {e}")
+        return mic
 
+    def _transcribe_audio(
+        self, segment_index: int, audio: np.ndarray, n_samples: int,
+    ) -> Optional[SegmentResult]:
         try:
-            text = self.transcriber.transcribe_array(mic)
+            text = self.transcriber.transcribe_array(audio)
             if text:
-                duration = len(segment.mic_audio) / self.sample_rate
                 return SegmentResult(
-                    segment_index=segment.segment_index,
+                    segment_index=segment_index,
                     text=text,
-                    audio_duration=duration,
+                    audio_duration=n_samples / self.sample_rate,
                 )
         except Exception as e:
             print(f"Segment transcription failed: {e}")
@@ -189,30 +338,122 @@ class StreamingPipeline:
         start_sample: int,
         end_sample: int,
     ) -> Optional[np.ndarray]:
-        """Extract the portion of system audio aligned with a mic segment."""
-        needed_len = end_sample - start_sample
+        """Extract the portion of system audio aligned with a mic segment.
 
+        Returns a view when the segment is fully covered; otherwise one
+        zero-filled buffer with the captured part copied in (no np.pad).
+        """
         if start_sample >= len(sys_audio):
             return None
 
-        available_end = min(end_sample, len(sys_audio))
-        ref = sys_audio[start_sample:available_end]
+        if end_sample <= len(sys_audio):
+            return sys_audio[start_sample:end_sample]
 
-        if len(ref) < needed_len:
-            ref = np.pad(ref, (0, needed_len - len(ref)), mode="constant")
+        out = np.zeros(end_sample - start_sample, dtype=np.float32)
+        valid = len(sys_audio) - start_sample
+        out[:valid] = sys_audio[start_sample:]
+        return out
 
-        return ref
+    def _sys_audio_window(self, start_sample: int, end_sample: int) -> Optional[np.ndarray]:
+        """Copy system audio [start_sample, end_sample) out of the live chunk list.
 
-    def _get_sys_audio_snapshot(self) -> Optional[np.ndarray]:
-        """Get a snapshot of system audio accumulated so far."""
-        if self._sys_audio_chunks is None:
+        Only the chunks overlapping the window are touched, so each segment
+        costs O(segment length) rather than a concatenate of everything
+        captured so far. Samples not yet captured are zero-filled; returns
+        None when the window starts past the captured audio.
+        """
+        chunks = self._sys_audio_chunks
+        if chunks is None:
             return None
 
-        chunks = list(self._sys_audio_chunks)  # Shallow copy for thread safety
-        if not chunks:
+        # Chunks are only ever appended: extend the offsets for new ones.
+        # Slicing copies the list under the GIL, safe against the capture thread.
+        ends = self._sys_chunk_ends
+        total = ends[-1] if ends else 0
+        for chunk in chunks[len(ends):]:
+            total += len(chunk)
+            ends.append(total)
+
+        if start_sample >= total:
             return None
 
+        out = np.zeros(end_sample - start_sample, dtype=np.float32)
+        i = bisect.bisect_right(ends, start_sample)
+        pos = start_sample
+        while pos < end_sample and i < len(ends):
+            chunk_start = ends[i] - len(chunks[i])
+            take = min(ends[i], end_sample) - pos
+            out[pos - start_sample:pos - start_sample + take] = (
+                chunks[i][pos - chunk_start:pos - chunk_start + take]
+            )
+            pos += take
+            i += 1
+        return out
+
+
+def _drain(q: queue.SimpleQueue):
+    """Drop everything currently queued on `q`."""
+    while True:
         try:
-            return np.concatenate(chunks, axis=0)
-        except Exception:
-            return None
+            q.get_nowait()
+        except queue.Empty:
+            return
+
+
+def stop_and_transcribe(rec, txr, pipe) -> tuple[Optional[str], float, float]:
+    """Stop `rec` and transcribe what it captured.
+
+    Shared by the websocket, bar and global-hotkey stop paths. Uses the
+    streaming pipeline when it is active, otherwise a single in-memory pass.
+
+    Returns (text, elapsed, audio_duration) or (None, 0, 0) if no audio.
+    """
+    use_streaming = pipe is not None and pipe.vad_available and pipe._active
+
+    if use_streaming:
+        rec.on_vad_chunk = None
+        mic_audio, sys_audio = rec.stop_raw()
+
+        if mic_audio is None or len(mic_audio) == 0:
+            pipe.stop(None)
+            return None, 0, 0
+
+        audio_duration = len(mic_audio) / rec.sample_rate
+
+        if audio_duration < pipe.SHORT_RECORDING_THRESHOLD_S:
+            pipe.stop(None)
+            if sys_audio is not None and len(sys_audio) > 0:
+                try:
+                    # AEC and gating share one buffer sized to the overlap
+                    n = min(len(mic_audio), len(sys_audio))
+                    out = np.empty(n, dtype=np.float32)
+                    mic_audio = nlms_echo_cancel(
+                        mic_audio[:n], sys_audio[:n], out=out,
+                        w_init=estimate_echo_path(mic_audio, sys_audio),
+                    )
+                    mic_audio = noise_gate(mic_audio, sample_rate=rec.sample_rate, out=mic_audio)
+                except Exception:
+                    pass
+            del sys_audio
+            t0 = time.perf_counter()
+            text = txr.transcribe_array(mic_audio)
+            elapsed = time.perf_counter() - t0
+            del mic_audio
+        else:
+            del mic_audio
+            t0 = time.perf_counter()
+            results = pipe.stop(sys_audio)
+            elapsed = time.perf_counter() - t0
+            del sys_audio
+            text = " ".join(r.text for r in results if r.text)
+
+        return text or None, elapsed, audio_duration
+    else:
+        audio = rec.stop_audio()
+        if audio is None or len(audio) == 0:
+            return None, 0, 0
+        audio_duration = len(audio) / rec.sample_rate
+        t0 = time.perf_counter()
+        text = txr.transcribe(audio)
+        elapsed = time.perf_counter() - t0
+        return text or None, elapsed, audio_duration
@@ -1,17 +1,14 @@
 # recorder.py
-import tempfile
-import wave
+import threading
 import numpy as np
 import sounddevice as sd
-from scipy.io import wavfile
-
-SAMPLE_RATE = 16000
 
+from aec import nlms_echo_cancel, noise_gate
 
-def get_wav_duration(path: str) -> float:
-    """Return duration of a WAV file in seconds."""
-    with wave.open(path, "r") as wf:
-        return wf.getnframes() / wf.getframerate()
+SAMPLE_RATE = 16000
+# Capture buffer block length: the callback writes into one preallocated
+# block and only allocates a fresh one every this many seconds
+BLOCK_SECONDS = 30
 
 
 class AudioRecorder:
@@ -19,99 +16,163 @@ class AudioRecorder:
         self.sample_rate = SAMPLE_RATE
         self.channels = 1
         self.is_recording = False
+        # Filled capture blocks (mono float32), plus the block being written
         self._chunks: list[np.ndarray] = []
+        self._block: np.ndarray | None = None
+        self._block_pos = 0
         self._stream: sd.InputStream | None = None
         self._sys_capture = None
         self.on_amplitude = None
         self.on_vad_chunk = None
+        # One recorder serves both the UI and the global hotkey; whichever
+        # starts first holds it until stopped
+        self._lock = threading.Lock()
+        self._claimed = False
 
     def _audio_callback(self, indata, frames, time, status):
         if status:
             print(f"Audio status: {status}")
         if self.is_recording:
-            self._chunks.append(indata.copy())
+            # Copy into the preallocated block instead of allocating a chunk
+            # per callback. Written slices are never overwritten, so the
+            # view is also safe for the VAD consumer to read later.
+            block, pos = self._block, self._block_pos
+            if block is None or pos + frames > len(block):
+                if pos:
+                    self._chunks.append(block[:pos])
+                block = self._block = np.empty(
+                    max(self.sample_rate * BLOCK_SECONDS, frames), dtype=np.float32
+                )
+                pos = 0
+            chunk = block[pos:pos + frames]
+            chunk[:] = indata[:, 0]
+            self._block_pos = pos + frames
             if self.on_amplitude is not None:
                 rms = float(np.sqrt(np.mean(indata ** 2)))
                 self.on_amplitude(rms)
             if self.on_vad_chunk is not None:
-                self.on_vad_chunk(indata)
+                self.on_vad_chunk(chunk)
 
-    def start(self):
-        self._chunks = []
-        self._stream = sd.InputStream(
-            samplerate=self.sample_rate,
-            channels=self.channels,
-            dtype=np.float32,
-            callback=self._audio_callback,
-        )
-
-        # Start system audio capture for echo cancellation
-        try:
-            from system_audio import SystemAudioCapture
-            self._sys_capture = SystemAudioCapture(sample_rate=self.sample_rate)
-            self._sys_capture.start()
-        except Exception as e:
-            print(f"System audio capture unavailable: {e}")
-            self._sys_capture = None
+    def start(self) -> bool:
+        """Start capturing.
 
-        self._stream.start()
-        self.is_recording = True
-
-    def stop(self) -> str:
-        self.is_recording = False
-        if self._stream is not None:
-            self._stream.stop()
-            self._stream.close()
-            self._stream = None
+        Returns False without doing anything if another caller's capture is
+        still running (the UI and the hotkey share one recorder).
+        """
+        with self._lock:
+            if self._claimed:
+                return False
+            self._claimed = True
 
-        # Get system audio reference
-        sys_audio = None
-        if self._sys_capture is not None:
+        self._chunks = []
+        self._block = np.empty(self.sample_rate * BLOCK_SECONDS, dtype=np.float32)
+        self._block_pos = 0
+        try:
+            self._stream = sd.InputStream(
+                samplerate=self.sample_rate,
+                channels=self.channels,
+                dtype=np.float32,
+                callback=self._audio_callback,
+            )
+
+            # Start system audio capture for echo cancellation
             try:
-                sys_audio = self._sys_capture.stop()
-            except Exception:
-                pass
-            self._sys_capture = None
+                from system_audio import SystemAudioCapture
+                self._sys_capture = SystemAudioCapture(sample_rate=self.sample_rate)
+                self._sys_capture.start()
+            except Exception as e:
+                print(f"System audio capture unavailable: {e}")
+                self._sys_capture = None
 
-        if not self._chunks:
-            return ""
+            self._stream.start()
+        except Exception:
+            # Tear down whatever was set up and give the claim back, or no
+            # caller could start the recorder again
+            try:
+                self.discard()
+            except Exception as e:
+                print(f"Recorder cleanup failed: {e}")
+            raise
+        self.is_recording = True
+        return True
 
-        chunks = self._chunks
-        self._chunks = []
+    def stop_audio(self) -> np.ndarray | None:
+        """Stop recording and return the processed audio in memory.
 
-        audio = np.concatenate(chunks, axis=0).flatten()
-        del chunks
+        Applies echo cancellation when system audio was captured and returns
+        float32 samples clipped to [-1, 1], or None if nothing was recorded.
+        """
+        try:
+            sys_audio = self._stop_capture()
+            audio = self._take_audio()
+        finally:
+            self._release()
+        if audio is None:
+            return None
 
         # Apply echo cancellation if we have system audio
         if sys_audio is not None and len(sys_audio) > 0:
             try:
-                from aec import nlms_echo_cancel, noise_gate
                 audio = nlms_echo_cancel(audio, sys_audio)
                 audio = noise_gate(audio, sample_rate=self.sample_rate)
             except Exception as e:
                 print(f"AEC failed, using raw audio: {e}")
         del sys_audio
 
-        audio_int16 = np.int16(np.clip(audio, -1.0, 1.0) * 32767)
-        del audio
-
-        tmp = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-        wavfile.write(tmp.name, self.sample_rate, audio_int16)
-        tmp.close()
-        del audio_int16
-        return tmp.name
+        return np.clip(audio, -1.0, 1.0, out=audio)
 
     def stop_raw(self) -> tuple[np.ndarray | None, np.ndarray | None]:
         """Stop recording and return raw mic + system audio without AEC.
 
         Used by the streaming pipeline, which applies AEC per-segment.
         """
+        try:
+            sys_audio = self._stop_capture()
+            mic_audio = self._take_audio()
+        finally:
+            self._release()
+        if mic_audio is None:
+            return None, None
+
+        return mic_audio, sys_audio
+
+    def _take_audio(self) -> np.ndarray | None:
+        """Return the captured audio as one mono array and reset the buffers.
+
+        A recording that fits in one block is returned as a view of it with
+        no copy; longer ones are concatenated once.
+        """
+        chunks = self._chunks
+        if self._block is not None and self._block_pos:
+            chunks.append(self._block[:self._block_pos])
+        self._chunks = []
+        self._block = None
+        self._block_pos = 0
+        if not chunks:
+            return None
+        if len(chunks) == 1:
+            return chunks[0].reshape(-1)
+        return np.concatenate([c.reshape(-1) for c in chunks])
+
+    def discard(self):
+        """Stop recording and drop the audio without processing or saving it."""
+        try:
+            self._stop_capture()
+        finally:
+            self._chunks = []
+            self._block = None
+            self._block_pos = 0
+            self._release()
+
+    def _stop_capture(self) -> np.ndarray | None:
+        """Stop the mic stream and system capture; return the system audio."""
         self.is_recording = False
         if self._stream is not None:
             self._stream.stop()
             self._stream.close()
             self._stream = None
 
+        # Get system audio reference
         sys_audio = None
         if self._sys_capture is not None:
             try:
@@ -119,16 +180,16 @@ class AudioRecorder:
             except Exception:
                 pass
             self._sys_capture = None
+        return sys_audio
 
-        if not self._chunks:
-            return None, None
-
-        chunks = self._chunks
-        self._chunks = []
-        mic_audio = np.concatenate(chunks, axis=0).flatten()
-        del chunks
+    def _release(self):
+        """Give up the claim on the recorder.
 
-        return mic_audio, sys_audio
+        Called only after the buffers are taken or reset, so a new start()
+        never shares them with the capture being stopped.
+        """
+        with self._lock:
+            self._claimed = False
 
     def get_sys_audio_chunks(self) -> list | None:
         """Return reference to system audio chunk list for live AEC alignment."""
@@ -7,6 +7,7 @@ Usage:
 
 Output: dist/WhisperDash.app
 """
+import certifi
 from setuptools import setup
 
 APP = ['main.py']
@@ -20,6 +21,9 @@ DATA_FILES = [
         'static/bar.css',
         'static/bar.js',
     ]),
+    # CA bundle at a fixed Resources path, so main.py can point SSL at it
+    # without importing certifi on every launch
+    ('', [certifi.where()]),
 ]
 
 OPTIONS = {
@@ -41,7 +45,9 @@ OPTIONS = {
         'uvicorn.protocols.http', 'uvicorn.protocols.http.auto',
         'uvicorn.protocols.websockets', 'uvicorn.protocols.websockets.auto',
         'uvicorn.lifespan', 'uvicorn.lifespan.on',
-        'starlette', 'websockets',
+        'uvicorn.loops.uvloop', 'uvicorn.protocols.http.httptools_impl',
+        'uvicorn.protocols.websockets.websockets_impl',
+        'starlette', 'websockets', 'uvloop', 'httptools',
         'anyio', 'anyio._backends._asyncio',
         # ML stack
         'mlx', 'mlx_whisper', 'onnxruntime',
@@ -61,10 +67,11 @@ OPTIONS = {
         # numba + llvmlite (required by mlx_whisper.timing, has native .so)
         'numba', 'llvmlite',
         'huggingface_hub', 'tiktoken', 'pydantic', 'pydantic_core',
-        'httpx', 'httpcore',
+        'httpx', 'httpcore', 'orjson',
         'filelock', 'fsspec', 'tqdm', 'yaml',
         'packaging', 'more_itertools',
         'webview', 'uvicorn', 'fastapi', 'starlette', 'anyio',
+        'uvloop', 'httptools',
         'certifi',
         # sounddevice + native PortAudio dylib (must not be zipped)
         'sounddevice', '_sounddevice_data',
@@ -15,9 +15,9 @@ class AppStateManager:
 
     def __init__(self):
         self._state = AppState.IDLE
-        self._state_callbacks: list = []
-        self._amplitude_callbacks: list = []
-        self._warning_callbacks: list = []
+        self._state_callbacks: set = set()
+        self._amplitude_callbacks: set = set()
+        self._warning_callbacks: set = set()
         self._amplitudes: deque[float] = deque(maxlen=200)
         self._lock = threading.Lock()
 
@@ -30,19 +30,21 @@ class AppStateManager:
         if old == new_state:
             return
         self._state = new_state
-        for cb in self._state_callbacks:
+        for cb in tuple(self._state_callbacks):
             try:
                 cb(old, new_state)
             except Exception:
                 pass
 
     def on_state_change(self, callback):
-        self._state_callbacks.append(callback)
+        """Register a callback; returns a function that unregisters it."""
+        self._state_callbacks.add(callback)
+        return lambda: self._state_callbacks.discard(callback)
 
     def push_amplitude(self, value: float):
         with self._lock:
             self._amplitudes.append(value)
-        for cb in self._amplitude_callbacks:
+        for cb in tuple(self._amplitude_callbacks):
             try:
                 cb(value)
             except Exception:
@@ -55,14 +57,18 @@ class AppStateManager:
             return amps
 
     def on_amplitude(self, callback):
-        self._amplitude_callbacks.append(callback)
+        """Register a callback; returns a function that unregisters it."""
+        self._amplitude_callbacks.add(callback)
+        return lambda: self._amplitude_callbacks.discard(callback)
 
     def push_warning(self, message: str):
-        for cb in self._warning_callbacks:
+        for cb in tuple(self._warning_callbacks):
             try:
                 cb(message)
             except Exception:
                 pass
 
     def on_warning(self, callback):
-        self._warning_callbacks.append(callback)
+        """Register a callback; returns a function that unregisters it."""
+        self._warning_callbacks.add(callback)
+        return lambda: self._warning_callbacks.discard(callback)
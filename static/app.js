@@ -403,6 +403,7 @@
     const historySearch = document.getElementById('history-search');
     const loadMoreBtn = document.getElementById('load-more-btn');
     let historyOffset = 0;
+    let historyLastId = null;
     const HISTORY_PAGE = 50;
     let totalHistory = 0;
 
@@ -438,13 +439,18 @@
     async function loadHistory(append) {
         if (!append) {
             historyOffset = 0;
+            historyLastId = null;
             historyList.innerHTML = '';
         }
-        const resp = await fetch('/api/history?limit=' + HISTORY_PAGE + '&offset=' + historyOffset);
+        // Page by the last id shown (keyset) rather than by offset
+        let url = '/api/history?limit=' + HISTORY_PAGE;
+        if (historyLastId !== null) url += '&before_id=' + historyLastId;
+        const resp = await fetch(url);
         const data = await resp.json();
         totalHistory = data.total;
         data.entries.forEach(e => historyList.appendChild(createHistoryEntry(e)));
         historyOffset += data.entries.length;
+        if (data.entries.length) historyLastId = data.entries[data.entries.length - 1].id;
         loadMoreBtn.classList.toggle('hidden', historyOffset >= totalHistory);
     }
 
@@ -523,7 +529,7 @@
         hotkeyBtn.classList.add('capturing');
         hotkeyDisplay.textContent = 'Press any key...';
 
-        // Tell backend to start pynput key capture
+        // Tell backend to start key capture on the event tap
         await fetch('/api/settings/hotkey/capture', { method: 'POST' });
 
         // Poll for captured key
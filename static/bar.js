@@ -86,20 +86,37 @@
         }, 5000);
     }
 
+    const AMPLITUDE_TAG = 0x41;  // 'A'
+
+    function handleMessage(msg) {
+        if (msg.type === 'state') {
+            setState(msg.state);
+        } else if (msg.type === 'warning') {
+            showWarning(msg.message);
+        } else if (msg.type === 'hotkey') {
+            tooltip.textContent = 'Hold ' + msg.display + ' to dictate';
+        }
+    }
+
     function connect() {
         const protocol = location.protocol === 'https:' ? 'wss:' : 'ws:';
         ws = new WebSocket(`${protocol}//${location.host}/ws/bar`);
+        ws.binaryType = 'arraybuffer';
 
         ws.onmessage = (event) => {
+            // Amplitude arrives as a 5-byte binary frame: 'A' + float32 LE
+            if (event.data instanceof ArrayBuffer) {
+                const view = new DataView(event.data);
+                if (view.byteLength === 5 && view.getUint8(0) === AMPLITUDE_TAG) {
+                    pushAmplitude(view.getFloat32(1, true));
+                }
+                return;
+            }
             const msg = JSON.parse(event.data);
-            if (msg.type === 'state') {
-                setState(msg.state);
-            } else if (msg.type === 'amplitude') {
-                pushAmplitude(msg.value);
-            } else if (msg.type === 'warning') {
-                showWarning(msg.message);
-            } else if (msg.type === 'hotkey') {
-                tooltip.textContent = 'Hold ' + msg.display + ' to dictate';
+            if (msg.type === 'batch') {
+                msg.items.forEach(handleMessage);
+            } else {
+                handleMessage(msg);
             }
         };
 
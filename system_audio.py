@@ -29,8 +29,10 @@ class _AudioHandler(NSObject):
             result = CoreMedia.CMBlockBufferCopyDataBytes(block_buf, 0, length, None)
             if result is not None:
                 _, raw_bytes = result
-                audio = np.frombuffer(raw_bytes, dtype=np.float32).copy()
-                self._chunks.append(audio)
+                # CMBlockBufferCopyDataBytes already returned a private copy;
+                # view it instead of copying again. The chunk is read-only,
+                # which every consumer (concatenate, AEC slices) is fine with.
+                self._chunks.append(np.frombuffer(raw_bytes, dtype=np.float32))
         except Exception:
             pass
 
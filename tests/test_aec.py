@@ -1,6 +1,9 @@
 # tests/test_aec.py
 import numpy as np
-from aec import nlms_echo_cancel, noise_gate
+import pytest
+
+import aec
+from aec import estimate_echo_path, fdaf_echo_cancel, nlms_echo_cancel, noise_gate
 
 
 def test_silent_ref_passes_mic_through():
@@ -107,3 +110,232 @@ def test_noise_gate_mixed_signal():
     quiet_energy = np.sum(gated[:burst_start] ** 2)
     original_quiet_energy = np.sum(signal[:burst_start] ** 2)
     assert quiet_energy < original_quiet_energy * 0.5
+
+
+def test_numba_kernel_matches_numpy_path(monkeypatch):
+    """Numba block kernel and the NumPy/FFT fallback produce the same output."""
+    if not aec._HAVE_NUMBA:
+        pytest.skip("numba not installed")
+
+    rng = np.random.default_rng(0)
+    ref = (rng.standard_normal(8000) * 0.2).astype(np.float32)
+    mic = np.zeros(8000, dtype=np.float32)
+    mic[50:] = ref[:-50] * 0.4
+    mic += (rng.standard_normal(8000) * 0.05).astype(np.float32)
+
+    out_numba = aec.nlms_echo_cancel(mic, ref, filter_len=400)
+    monkeypatch.setattr(aec, "_HAVE_NUMBA", False)
+    out_numpy = aec.nlms_echo_cancel(mic, ref, filter_len=400)
+    np.testing.assert_allclose(out_numba, out_numpy, atol=1e-4)
+
+
+def test_vss_converges_faster_than_fixed_step():
+    """Variable step size reaches low error sooner, then stays converged."""
+    n = 16000
+    t = np.arange(n) / 16000
+    ref = (np.sin(2 * np.pi * 440 * t) * 0.3).astype(np.float32)
+    voice = (np.sin(2 * np.pi * 200 * t) * 0.2).astype(np.float32)
+    mic = voice.copy()
+    mic[100:] += ref[:-100] * 0.5
+
+    fixed = nlms_echo_cancel(mic, ref, filter_len=800, step_size=0.5)
+    vss = nlms_echo_cancel(mic, ref, filter_len=800, vss=True)
+
+    def residual(out, a, b):
+        return np.mean((out[a:b] - voice[a:b]) ** 2) / np.mean((mic[a:b] - voice[a:b]) ** 2)
+
+    assert residual(vss, 1300, 2300) < residual(fixed, 1300, 2300) * 0.5
+    assert residual(vss, 8000, n) < 0.01
+
+
+def test_vss_numba_matches_numpy_path(monkeypatch):
+    if not aec._HAVE_NUMBA:
+        pytest.skip("numba not installed")
+
+    rng = np.random.default_rng(7)
+    ref = (rng.standard_normal(8000) * 0.2).astype(np.float32)
+    mic = np.zeros(8000, dtype=np.float32)
+    mic[50:] = ref[:-50] * 0.4
+    mic += (rng.standard_normal(8000) * 0.05).astype(np.float32)
+
+    out_numba = aec.nlms_echo_cancel(mic, ref, filter_len=400, vss=True)
+    monkeypatch.setattr(aec, "_HAVE_NUMBA", False)
+    out_numpy = aec.nlms_echo_cancel(mic, ref, filter_len=400, vss=True)
+    np.testing.assert_allclose(out_numba, out_numpy, atol=1e-4)
+
+
+def test_noise_gate_numba_matches_numpy_path(monkeypatch):
+    """Numba gate kernels and the NumPy fallback gate the same frames."""
+    if not aec._HAVE_NUMBA:
+        pytest.skip("numba not installed")
+
+    rng = np.random.default_rng(1)
+    n = 32000
+    signal = (rng.standard_normal(n) * 0.003).astype(np.float32)
+    signal[n // 2:] += (np.sin(2 * np.pi * 300 * np.arange(n // 2) / 16000) * 0.3).astype(np.float32)
+
+    gated_numba = aec.noise_gate(signal)
+    monkeypatch.setattr(aec, "_HAVE_NUMBA", False)
+    gated_numpy = aec.noise_gate(signal)
+    np.testing.assert_allclose(gated_numba, gated_numpy, atol=1e-6)
+
+
+def test_noise_gate_numba_copies_partial_tail_frame(monkeypatch):
+    """The fused gate kernel copies samples past the last whole frame."""
+    if not aec._HAVE_NUMBA:
+        pytest.skip("numba not installed")
+
+    rng = np.random.default_rng(2)
+    n = 32000 + 123
+    signal = (rng.standard_normal(n) * 0.003).astype(np.float32)
+    signal[n // 2:] += (np.sin(2 * np.pi * 300 * np.arange(n - n // 2) / 16000) * 0.3).astype(np.float32)
+
+    gated_numba = aec.noise_gate(signal.copy(), out=None)
+    in_place = signal.copy()
+    aec.noise_gate(in_place, out=in_place)
+    monkeypatch.setattr(aec, "_HAVE_NUMBA", False)
+    gated_numpy = aec.noise_gate(signal)
+    np.testing.assert_allclose(gated_numba, gated_numpy, atol=1e-6)
+    np.testing.assert_array_equal(in_place, gated_numba)
+    np.testing.assert_array_equal(gated_numba[-123:], signal[-123:])
+
+
+def test_float64_input_returns_float32():
+    """float64 callers are converted once and get a float32 result."""
+    mic = np.random.randn(4000) * 0.1
+    ref = np.random.randn(4000) * 0.1
+    out = nlms_echo_cancel(mic, ref, filter_len=400)
+    assert out.dtype == np.float32
+    assert len(out) == 4000
+
+
+def test_fft_block_matches_direct_matvec():
+    """FFT convolution/correlation equals the explicit reference-matrix update."""
+    rng = np.random.default_rng(5)
+    L, start, blen, mu, eps = 64, 100, 32, 0.5, np.float32(1e-8)
+    ref = rng.standard_normal(300).astype(np.float32)
+    mic = rng.standard_normal(300).astype(np.float32)
+    w = rng.standard_normal(L).astype(np.float32) * 0.1
+
+    rm = np.stack([ref[i - L:i][::-1] for i in range(start, start + blen)]).astype(np.float64)
+    err = mic[start:start + blen] - rm @ w
+    norms = np.einsum("ij,ij->i", rm, rm) + eps
+    w_expected = w + mu * (rm.T @ (err / norms)) / blen
+
+    output = np.zeros(300, dtype=np.float32)
+    energy = float(rm[0] @ rm[0])
+    new_energy = aec._nlms_block_fft(ref, w, mic, start, blen, mu, eps, energy, output)
+    np.testing.assert_allclose(output[start:start + blen], err, atol=1e-4)
+    np.testing.assert_allclose(w, w_expected, atol=1e-4)
+    tail = ref[start + blen - L:start + blen].astype(np.float64)
+    assert new_energy == pytest.approx(float(tail @ tail), rel=1e-5)
+
+
+def test_out_buffers_match_allocating_path():
+    rng = np.random.default_rng(3)
+    ref = rng.standard_normal(8000).astype(np.float32) * 0.3
+    mic = np.roll(ref, 40) * 0.5 + rng.standard_normal(8000).astype(np.float32) * 0.01
+    expected = noise_gate(nlms_echo_cancel(mic, ref))
+    out = np.empty(8000, dtype=np.float32)
+    result = nlms_echo_cancel(mic, ref, out=out)
+    assert result is out
+    assert noise_gate(out, out=out) is out
+    np.testing.assert_array_equal(out, expected)
+
+
+def test_silent_reference_passes_mic_through():
+    rng = np.random.default_rng(4)
+    mic = rng.standard_normal(8000).astype(np.float32) * 0.1
+    ref = np.full(9000, 1e-5, dtype=np.float32)
+    result = nlms_echo_cancel(mic, ref)
+    np.testing.assert_array_equal(result, mic)
+
+
+def test_fdaf_cancels_broadband_echo():
+    """FDAF removes most of a room-like echo of a noise reference."""
+    rng = np.random.default_rng(6)
+    n = 32000
+    ref = (rng.standard_normal(n) * 0.2).astype(np.float32)
+    h = rng.standard_normal(300) * np.exp(-np.arange(300) / 50)
+    h /= np.abs(h).sum()
+    echo = np.convolve(ref, h)[:n].astype(np.float32)
+    voice = (rng.standard_normal(n) * 0.02).astype(np.float32)
+    mic = voice + echo
+
+    out = fdaf_echo_cancel(mic, ref)
+    error_before = np.mean((mic[8000:] - voice[8000:]) ** 2)
+    error_after = np.mean((out[8000:] - voice[8000:]) ** 2)
+    assert out.dtype == np.float32 and len(out) == n
+    assert error_after < error_before * 0.2
+
+
+def test_fdaf_stable_on_narrowband_reference():
+    """A pure-tone reference must not blow up bins it leaves empty."""
+    n = 16000
+    t = np.arange(n) / 16000
+    ref = (np.sin(2 * np.pi * 440 * t) * 0.3).astype(np.float32)
+    voice = (np.sin(2 * np.pi * 200 * t) * 0.2).astype(np.float32)
+    mic = voice.copy()
+    mic[100:] += ref[:-100] * 0.5
+    out = fdaf_echo_cancel(mic, ref, filter_len=800)
+    error_before = np.mean((mic[2000:] - voice[2000:]) ** 2)
+    error_after = np.mean((out[2000:] - voice[2000:]) ** 2)
+    assert error_after < error_before * 0.5
+
+
+def test_fdaf_passes_mic_through_for_silent_or_short_ref():
+    mic = np.random.randn(8000).astype(np.float32) * 0.1
+    np.testing.assert_array_equal(fdaf_echo_cancel(mic, np.zeros(8000, dtype=np.float32)), mic)
+    np.testing.assert_array_equal(fdaf_echo_cancel(mic[:100], mic[:100], filter_len=200), mic[:100])
+
+
+def test_silent_reference_blocks_pass_mic_through(monkeypatch):
+    """Blocks whose reference span is silent are skipped in both paths."""
+    rng = np.random.default_rng(8)
+    n, L = 12000, 400
+    ref = (rng.standard_normal(n) * 0.2).astype(np.float32)
+    ref[4000:9000] = 0.0  # system audio paused
+    mic = np.roll(ref, 30) * 0.4 + (rng.standard_normal(n) * 0.05).astype(np.float32)
+
+    outs = []
+    for have_numba in ([True, False] if aec._HAVE_NUMBA else [False]):
+        monkeypatch.setattr(aec, "_HAVE_NUMBA", have_numba)
+        outs.append(aec.nlms_echo_cancel(mic, ref, filter_len=L, block_size=256))
+    # Blocks (starting at L + k*256) from 4752 up to 8848 read only the paused span
+    for out in outs:
+        np.testing.assert_array_equal(out[4752:8848], mic[4752:8848])
+    if len(outs) == 2:
+        np.testing.assert_allclose(outs[0][:9000], outs[1][:9000], atol=1e-4)
+
+
+def test_warmup_kernels_runs():
+    """Warmup compiles the kernels on toy input without raising."""
+    aec.warmup_kernels()
+
+
+def test_warm_start_cancels_echo_from_the_start():
+    """A least-squares warm start removes the echo before NLMS converges."""
+    n = 16000
+    t = np.arange(n) / 16000
+    ref = (np.sin(2 * np.pi * 440 * t) * 0.3).astype(np.float32)
+    voice = (np.sin(2 * np.pi * 200 * t) * 0.2).astype(np.float32)
+    mic = voice.copy()
+    mic[100:] += ref[:-100] * 0.5
+
+    w0 = estimate_echo_path(mic, ref, filter_len=800)
+    assert w0.shape == (800,) and w0.dtype == np.float32
+    cold = nlms_echo_cancel(mic, ref, filter_len=800)
+    warm = nlms_echo_cancel(mic, ref, filter_len=800, w_init=w0)
+
+    def residual(out):
+        a, b = 800, 1800
+        return np.mean((out[a:b] - voice[a:b]) ** 2) / np.mean((mic[a:b] - voice[a:b]) ** 2)
+
+    assert residual(warm) < 0.01
+    assert residual(warm) < residual(cold) * 0.1
+
+
+def test_estimate_echo_path_none_for_silent_or_short_ref():
+    mic = np.random.randn(8000).astype(np.float32)
+    assert estimate_echo_path(mic, np.zeros(8000, dtype=np.float32)) is None
+    assert estimate_echo_path(mic[:1000], mic[:1000], filter_len=1600) is None
@@ -1,6 +1,8 @@
 # tests/test_app.py
 import tempfile
 import os
+import struct
+import numpy as np
 import pytest
 from unittest.mock import patch, MagicMock, AsyncMock
 from fastapi.testclient import TestClient
@@ -19,10 +21,10 @@ def test_static_index_served():
     assert "WhisperDash" in resp.text
 
 
-@patch("app.get_wav_duration", return_value=3.5)
-def test_websocket_start_stop_flow(_mock_dur):
+def test_websocket_start_stop_flow():
     mock_recorder = MagicMock()
-    mock_recorder.stop.return_value = "/tmp/fake.wav"
+    mock_recorder.sample_rate = 16000
+    mock_recorder.stop_audio.return_value = np.zeros(56000, dtype=np.float32)
     mock_transcriber = MagicMock()
     mock_transcriber.transcribe.return_value = "Hello world."
     mock_transcriber.is_ready = True
@@ -49,6 +51,34 @@ def test_websocket_start_stop_flow(_mock_dur):
         assert result_msg["text"] == "Hello world."
 
 
+def test_websocket_transcribe_file_writes_output():
+    mock_transcriber = MagicMock()
+    mock_transcriber.transcribe.return_value = "From a file."
+    app = create_app(recorder=MagicMock(), transcriber=mock_transcriber)
+    client = TestClient(app)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        audio = os.path.join(tmpdir, "memo.wav")
+        open(audio, "wb").close()
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"action": "transcribe_file", "path": os.path.join(tmpdir, "missing.wav")})
+            assert ws.receive_json()["type"] == "error"
+            ws.send_json({"action": "transcribe_file", "path": audio})
+            assert ws.receive_json()["type"] == "file_status"
+            result = ws.receive_json()
+        assert result["type"] == "file_result"
+        with open(result["output_path"], encoding="utf-8") as f:
+            assert f.read() == "From a file."
+
+
+def test_static_index_revalidates_with_etag():
+    client = TestClient(create_app())
+    first = client.get("/")
+    assert first.headers["cache-control"] == "no-cache"
+    again = client.get("/", headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+    assert again.content == b""
+
+
 def test_bar_page_served():
     app = create_app()
     client = TestClient(app)
@@ -73,7 +103,8 @@ def test_bar_websocket_receives_state():
 def test_bar_websocket_start_stop():
     sm = AppStateManager()
     mock_recorder = MagicMock()
-    mock_recorder.stop.return_value = "/tmp/fake.wav"
+    mock_recorder.sample_rate = 16000
+    mock_recorder.stop_audio.return_value = np.zeros(16000, dtype=np.float32)
     mock_transcriber = MagicMock()
     mock_transcriber.transcribe.return_value = "Hello"
     mock_transcriber.is_ready = True
@@ -87,6 +118,108 @@ def test_bar_websocket_start_stop():
         assert msg["state"] == "recording"
 
 
+def _hotkey_owned_recorder():
+    """Recorder already claimed by the global hotkey: UI starts are refused."""
+    import threading
+    rec = MagicMock()
+    rec.is_recording = True
+    rec.start_called = threading.Event()
+    rec.start.side_effect = lambda: rec.start_called.set() or False
+    return rec
+
+
+def test_bar_cancel_leaves_hotkey_recording_alone():
+    rec = _hotkey_owned_recorder()
+    sm = AppStateManager()
+    sm.set_state(AppState.RECORDING)  # as the hotkey does
+    app = create_app(recorder=rec, transcriber=MagicMock(), state_manager=sm)
+    client = TestClient(app)
+    with client.websocket_connect("/ws/bar") as ws:
+        ws.receive_json()  # initial state
+        ws.send_json({"action": "cancel"})
+        ws.send_json({"action": "stop"})
+        # Commands are handled in order: once start is seen, both were processed
+        ws.send_json({"action": "start"})
+        assert rec.start_called.wait(2)
+    rec.discard.assert_not_called()
+    rec.stop_audio.assert_not_called()
+    rec.stop_raw.assert_not_called()
+    assert sm.state == AppState.RECORDING
+
+
+def test_websocket_stop_after_refused_start_leaves_recorder_alone():
+    rec = _hotkey_owned_recorder()
+    txr = MagicMock(spec=["is_ready", "transcribe"])
+    txr.is_ready = True
+    app = create_app(recorder=rec, transcriber=txr)
+    client = TestClient(app)
+    with client.websocket_connect("/ws") as ws:
+        ws.send_json({"action": "start"})
+        assert ws.receive_json()["type"] == "error"
+        ws.send_json({"action": "stop"})
+        ws.send_json({"action": "status"})
+        assert ws.receive_json()["type"] == "model_status"
+    rec.stop_audio.assert_not_called()
+    rec.stop_raw.assert_not_called()
+
+
+def test_bar_websocket_coalesces_amplitude():
+    sm = AppStateManager()
+    app = create_app(recorder=MagicMock(), transcriber=MagicMock(), state_manager=sm)
+    client = TestClient(app)
+    with client.websocket_connect("/ws/bar") as ws:
+        ws.receive_json()  # initial state
+        for val in (0.1, 0.2, 0.3):
+            sm.push_amplitude(val)
+        # The first value may go out immediately; the rest coalesce
+        values = []
+        while not values or values[-1] != pytest.approx(0.3):
+            frame = ws.receive_bytes()
+            assert len(frame) == 5
+            tag, value = struct.unpack("<cf", frame)
+            assert tag == b"A"
+            values.append(value)
+        assert len(values) <= 2
+
+
+def test_bar_websocket_sends_amplitude_after_idle_gap():
+    sm = AppStateManager()
+    app = create_app(recorder=MagicMock(), transcriber=MagicMock(), state_manager=sm)
+    client = TestClient(app)
+    with client.websocket_connect("/ws/bar") as ws:
+        ws.receive_json()  # initial state
+        sm.push_amplitude(0.1)
+        assert struct.unpack("<cf", ws.receive_bytes())[1] == pytest.approx(0.1)
+        # The slot was emptied by the send: the next value wakes the pusher again
+        sm.push_amplitude(0.5)
+        assert struct.unpack("<cf", ws.receive_bytes())[1] == pytest.approx(0.5)
+
+
+def test_bar_websocket_delivers_events_in_order_across_batches():
+    sm = AppStateManager()
+    app = create_app(recorder=MagicMock(), transcriber=MagicMock(), state_manager=sm)
+    client = TestClient(app)
+    with client.websocket_connect("/ws/bar") as ws:
+        ws.receive_json()  # initial state
+        for i in range(5):
+            sm.push_warning(str(i))
+        received = []
+        while len(received) < 5:
+            msg = ws.receive_json()
+            received.extend(msg["items"] if msg["type"] == "batch" else [msg])
+        assert [m["message"] for m in received] == ["0", "1", "2", "3", "4"]
+
+
+def test_bar_outbox_drops_oldest_events_when_full():
+    from app import _BarOutbox
+    outbox = _BarOutbox()
+    for i in range(_BarOutbox.MAX_EVENTS + 5):
+        outbox.post({"type": "warning", "message": str(i)})
+    assert len(outbox.events) == _BarOutbox.MAX_EVENTS
+    assert outbox.events[0]["message"] == "5"
+    assert outbox.ready.is_set()
+
+
 def test_history_api_returns_entries():
     tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
     db_path = tmp.name
@@ -1,6 +1,8 @@
 # tests/test_history.py
 import os
+import sqlite3
 import tempfile
+import time
 from history import TranscriptionHistory
 
 
@@ -42,6 +44,16 @@ def test_get_recent_respects_offset():
     os.unlink(path)
 
 
+def test_get_recent_pages_by_before_id():
+    h, path = make_history()
+    for i in range(5):
+        h.add(f"Entry {i}", duration=1.0, latency=0.5)
+    first = h.get_recent(limit=2)
+    second = h.get_recent(limit=2, before_id=first[-1]["id"])
+    assert [e["text"] for e in second] == ["Entry 2", "Entry 1"]
+    os.unlink(path)
+
+
 def test_search():
     h, path = make_history()
     h.add("The quick brown fox", duration=2.0, latency=0.5)
@@ -70,4 +82,88 @@ def test_count():
     h.add("One", duration=1.0, latency=0.5)
     h.add("Two", duration=1.0, latency=0.5)
     assert h.count() == 2
+    h.close()
+    assert TranscriptionHistory(path).count() == 2
+    os.unlink(path)
+
+
+def test_persists_across_instances_in_wal_mode():
+    h, path = make_history()
+    h.add("Kept", duration=1.0, latency=0.5)
+    mode = h._conn.execute("PRAGMA journal_mode").fetchone()[0]
+    assert mode == "wal"
+    h.close()
+    h2 = TranscriptionHistory(path)
+    assert h2.get_recent()[0]["text"] == "Kept"
+    h2.close()
+    os.unlink(path)
+
+
+def test_search_matches_word_prefixes_and_escapes_quotes():
+    h, path = make_history()
+    h.add("Transcribing quickly", duration=1.0, latency=0.5)
+    h.add('She said "hi"', duration=1.0, latency=0.5)
+    assert [e["text"] for e in h.search("transcri")] == ["Transcribing quickly"]
+    assert [e["text"] for e in h.search('"hi')] == ['She said "hi"']
+    assert len(h.search("")) == 2
+    os.unlink(path)
+
+
+def test_search_indexes_rows_from_before_fts():
+    h, path = make_history()
+    h._conn.executescript("""
+        DROP TABLE transcriptions_fts;
+        DROP TRIGGER transcriptions_ai;
+        DROP TRIGGER transcriptions_ad;
+        DROP TRIGGER transcriptions_au;
+    """)
+    h._conn.execute(
+        "INSERT INTO transcriptions (text, timestamp) VALUES ('legacy row', 'x')"
+    )
+    h.close()
+    h2 = TranscriptionHistory(path)
+    assert [e["text"] for e in h2.search("legacy")] == ["legacy row"]
+    h2.close()
+    os.unlink(path)
+
+
+def test_add_is_committed_by_background_writer():
+    h, path = make_history()
+    h.add("Queued", duration=1.0, latency=0.5)
+    assert h.count() == 1
+    # A separate connection never flushes, so it only sees the writer's commit
+    other = sqlite3.connect(path)
+    for _ in range(100):
+        rows = other.execute("SELECT text FROM transcriptions").fetchall()
+        if rows:
+            break
+        time.sleep(0.01)
+    assert rows == [("Queued",)]
+    other.close()
+    h.close()
+    os.unlink(path)
+
+
+def test_close_commits_pending_rows_and_stops_writer():
+    h, path = make_history()
+    h.add("Last words", duration=1.0, latency=0.5)
+    h.close()
+    assert not h._writer.is_alive()
+    # A flush after close (e.g. a late writer wake) must not touch the connection
+    h.flush()
+    h.close()
+    other = sqlite3.connect(path)
+    rows = other.execute("SELECT text FROM transcriptions").fetchall()
+    other.close()
+    assert rows == [("Last words",)]
+    os.unlink(path)
+
+
+def test_add_rounds_duration_and_latency():
+    h, path = make_history()
+    h.add("Raw timings", duration=2.34567, latency=0.81234)
+    entry = h.get_recent()[0]
+    assert entry["duration_seconds"] == 2.35
+    assert entry["latency_seconds"] == 0.81
+    h.close()
     os.unlink(path)
@@ -1,5 +1,7 @@
 # tests/test_hotkey.py
+import threading
 import time
+import numpy as np
 from unittest.mock import MagicMock, patch
 from hotkey import GlobalHotkey
 from state import AppState, AppStateManager
@@ -15,6 +17,7 @@ KC_F5 = 96        # F5
 def make_hotkey(model_ready=True):
     rec = MagicMock()
     rec.is_recording = False
+    rec.sample_rate = 16000
     txr = MagicMock()
     txr.is_ready = model_ready
     sm = AppStateManager()
@@ -35,7 +38,7 @@ def test_hotkey_initializes():
 def test_hold_to_talk():
     """Hold >400ms: starts on press, stops on release → transcribe."""
     hk, rec, txr, sm, history = make_hotkey()
-    rec.stop.return_value = "/tmp/fake.wav"
+    rec.stop_audio.return_value = np.zeros(56000, dtype=np.float32)
     txr.transcribe.return_value = "Hello"
 
     hk._on_press(KC_ALT_R)
@@ -44,7 +47,7 @@ def test_hold_to_talk():
     assert sm.state == AppState.RECORDING
 
     # Simulate hold > HOLD_THRESHOLD
-    hk.press_start_time = time.time() - 0.5
+    hk.press_start_time = time.monotonic_ns() - 500_000_000
     hk._on_release(KC_ALT_R)
     assert not hk.is_recording
     assert not hk.toggle_mode
@@ -57,7 +60,7 @@ def test_double_tap_starts_toggle_mode():
     # First tap
     hk._on_press(KC_ALT_R)
     assert hk.is_recording
-    hk.press_start_time = time.time() - 0.1  # short hold
+    hk.press_start_time = time.monotonic_ns() - 100_000_000  # short hold
     hk._on_release(KC_ALT_R)
     # After first tap, orphan timer is set, recording continues
     assert hk.is_recording
@@ -66,7 +69,7 @@ def test_double_tap_starts_toggle_mode():
 
     # Second tap within window
     hk._on_press(KC_ALT_R)
-    hk.press_start_time = time.time() - 0.1  # short hold
+    hk.press_start_time = time.monotonic_ns() - 100_000_000  # short hold
     hk._on_release(KC_ALT_R)
 
     assert hk.toggle_mode is True
@@ -77,7 +80,7 @@ def test_double_tap_starts_toggle_mode():
 def test_single_tap_stops_toggle_mode():
     """Single tap while in toggle mode → stops recording & transcribes."""
     hk, rec, txr, sm, history = make_hotkey()
-    rec.stop.return_value = "/tmp/fake.wav"
+    rec.stop_audio.return_value = np.zeros(56000, dtype=np.float32)
     txr.transcribe.return_value = "Hello"
 
     # Put into toggle mode manually
@@ -87,7 +90,7 @@ def test_single_tap_stops_toggle_mode():
 
     # Single short tap → stops recording
     hk._on_press(KC_ALT_R)
-    hk.press_start_time = time.time() - 0.1
+    hk.press_start_time = time.monotonic_ns() - 100_000_000
     hk._on_release(KC_ALT_R)
 
     assert hk.toggle_mode is False
@@ -101,7 +104,7 @@ def test_orphan_single_tap_cancels_recording():
 
     hk._on_press(KC_ALT_R)
     assert hk.is_recording
-    hk.press_start_time = time.time() - 0.1  # short hold
+    hk.press_start_time = time.monotonic_ns() - 100_000_000  # short hold
     hk._on_release(KC_ALT_R)
 
     # Simulate orphan timer firing
@@ -109,7 +112,8 @@ def test_orphan_single_tap_cancels_recording():
 
     assert not hk.is_recording
     assert sm.state == AppState.IDLE
-    rec.stop.assert_called_once()  # discard audio
+    rec.discard.assert_called_once()
+    rec.stop.assert_not_called()  # no WAV written for discarded audio
 
 
 def test_hotkey_ignores_other_keys():
@@ -137,20 +141,21 @@ def test_hotkey_does_not_activate_when_processing():
     rec.start.assert_not_called()
 
 
-@patch("hotkey.get_wav_duration", return_value=3.5)
-def test_process_recording_sets_states(_mock_dur):
+def test_process_recording_sets_states():
     hk, rec, txr, sm, history = make_hotkey()
-    rec.stop.return_value = "/tmp/fake.wav"
+    rec.stop_audio.return_value = np.zeros(56000, dtype=np.float32)
     txr.transcribe.return_value = "Hello"
     sm.set_state(AppState.RECORDING)
     hk._process_recording()
     assert sm.state == AppState.IDLE
+    txr.transcribe.assert_called_once_with(rec.stop_audio.return_value)
     history.add.assert_called_once()
+    assert history.add.call_args[1]["duration"] == 3.5
 
 
 def test_process_recording_empty_returns_idle():
     hk, rec, txr, sm, history = make_hotkey()
-    rec.stop.return_value = ""
+    rec.stop_audio.return_value = None
     sm.set_state(AppState.RECORDING)
     hk._process_recording()
     assert sm.state == AppState.IDLE
@@ -160,7 +165,7 @@ def test_process_recording_empty_returns_idle():
 def test_max_duration_stops_recording():
     """Max duration timer fires → force stops recording."""
     hk, rec, txr, sm, history = make_hotkey()
-    rec.stop.return_value = "/tmp/fake.wav"
+    rec.stop_audio.return_value = np.zeros(56000, dtype=np.float32)
     txr.transcribe.return_value = "Dictation text"
 
     # Simulate toggle recording in progress
@@ -328,3 +333,112 @@ def test_capture_ignores_unknown_keycodes():
     hk._on_press(KC_F5)
     result = hk.poll_key_capture()
     assert result["captured"] is True
+
+
+def test_scheduler_runs_due_callbacks_in_order_and_skips_cancelled():
+    from hotkey import _Scheduler
+    sched = _Scheduler()
+    fired = []
+    done = threading.Event()
+    sched.schedule(0.03, lambda: (fired.append("late"), done.set()))
+    cancelled = sched.schedule(0.01, lambda: fired.append("cancelled"))
+    sched.schedule(0.02, lambda: fired.append("early"))
+    sched.cancel(cancelled)
+    assert done.wait(2.0)
+    assert fired == ["early", "late"]
+
+
+def test_release_claims_processing_before_worker_starts():
+    """A press racing the transcription worker must not start a new take."""
+    hk, rec, txr, sm, history = make_hotkey()
+    hk._on_press(KC_ALT_R)
+    hk.press_start_time = time.monotonic_ns() - 500_000_000
+    with patch.object(hk, "_work_q"):
+        hk._on_release(KC_ALT_R)
+    assert hk._processing is True
+
+    hk._on_press(KC_ALT_R)
+    assert not hk.is_recording
+    rec.start.assert_called_once()
+
+
+def test_recordings_are_processed_on_one_worker_thread():
+    hk, rec, txr, sm, history = make_hotkey()
+    seen = []
+    done = threading.Event()
+    for _ in range(3):
+        hk._work_q.put(lambda: seen.append(threading.current_thread().name))
+    hk._work_q.put(done.set)
+    assert done.wait(2.0)
+    assert seen == ["hotkey-transcribe"] * 3
+
+
+def test_nx_keytype_map_resolves_to_keycodes():
+    from hotkey import NX_KEYTYPE_TO_KEYCODE
+    from config import NAME_TO_KEYCODE
+    assert NX_KEYTYPE_TO_KEYCODE[0] == NAME_TO_KEYCODE["f12"]
+    assert NX_KEYTYPE_TO_KEYCODE[3] == NAME_TO_KEYCODE["f1"]
+
+
+def test_stale_orphan_timer_does_not_stop_newer_recording():
+    """An orphan timer armed for an earlier take is ignored."""
+    hk, rec, txr, sm, history = make_hotkey()
+    rec.is_recording = True
+    hk._on_press(KC_ALT_R)
+    stale = hk._session
+    hk.press_start_time = time.monotonic_ns() - 100_000_000
+    hk._on_release(KC_ALT_R)
+    hk._on_orphan_tap()
+
+    hk._on_press(KC_ALT_R)
+    hk._on_orphan_tap(stale)
+    assert hk.is_recording
+    assert sm.state == AppState.RECORDING
+
+
+def test_nx_events_skipped_unless_media_key_can_trigger():
+    hk, rec, txr, sm, history = make_hotkey()
+    event = object()
+    with patch.object(hk, "_handle_nx_event") as handle:
+        assert hk._event_callback(None, 14, event, None) is event
+        handle.assert_not_called()
+
+        hk._on_hotkey_changed("f12")
+        hk._event_callback(None, 14, event, None)
+        handle.assert_called_once_with(event)
+
+
+def test_flags_changed_tracks_trigger_modifier_press_and_release():
+    """Modifier press/release is read from the event's device flags."""
+    hk, rec, txr, sm, history = make_hotkey()
+    flags_changed = object()
+    alt_r_down = 0x40
+
+    def send(keycode, flags=0):
+        return hk._event_callback(
+            None, flags_changed, keycode, None,
+            _get_field=lambda event, field: event,
+            _get_flags=lambda event: flags,
+            _flags_changed=flags_changed,
+        )
+
+    assert send(KC_SHIFT, flags=0x02) == KC_SHIFT  # unrelated modifier passes through
+
+    assert send(KC_ALT_R, flags=alt_r_down) is None
+    assert hk.is_recording
+    # A repeated "down" (e.g. a missed release) must not read as a release
+    assert send(KC_ALT_R, flags=alt_r_down) is None
+    assert hk.is_recording
+    hk.press_start_time = time.monotonic_ns() - 500_000_000
+    with patch.object(hk, "_work_q"):
+        assert send(KC_ALT_R, flags=0) is None
+    assert not hk.is_recording
+    assert hk._held_mask == 0
+
+
+def test_hotkey_backs_off_when_shared_recorder_busy():
+    hk, rec, txr, sm, history = make_hotkey()
+    rec.start.return_value = False
+    hk._on_press(KC_ALT_R)
+    assert not hk.is_recording
+    assert sm.state == AppState.IDLE
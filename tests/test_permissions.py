@@ -0,0 +1,65 @@
+# tests/test_permissions.py
+from unittest.mock import MagicMock
+
+import pytest
+
+import permissions
+
+
+@pytest.fixture
+def ax(monkeypatch):
+    """Fresh AX cache with a mocked AXIsProcessTrusted and observer."""
+    trusted = MagicMock(return_value=True)
+    monkeypatch.setattr(permissions, "_ax_is_trusted", trusted)
+    monkeypatch.setattr(permissions, "_ax_observing", True)
+    monkeypatch.setattr(permissions, "_ax_cached", None)
+    monkeypatch.setattr(permissions, "_ax_changed_at", None)
+    return trusted
+
+
+def test_accessibility_granted_is_cached(ax):
+    assert permissions._accessibility_granted() is True
+    assert permissions._accessibility_granted() is True
+    assert ax.call_count == 1
+
+
+def test_accessibility_denied_is_never_cached(ax):
+    ax.return_value = False
+    assert permissions._accessibility_granted() is False
+    ax.return_value = True
+    assert permissions._accessibility_granted() is True
+    assert ax.call_count == 2
+
+
+def test_accessibility_not_cached_without_observer(ax, monkeypatch):
+    monkeypatch.setattr(permissions, "_ax_observing", False)
+    observe = MagicMock()
+    monkeypatch.setattr(permissions, "observe_ax_trust", observe)
+    permissions._accessibility_granted()
+    permissions._accessibility_granted()
+    assert ax.call_count == 2
+    # Registration belongs to the main thread, never the request handler
+    observe.assert_not_called()
+
+
+def test_trust_change_notification_invalidates_cache(ax):
+    permissions._accessibility_granted()
+    permissions._on_ax_trust_changed(None, None, "com.apple.accessibility.api", None, None)
+    ax.return_value = False
+    assert permissions._accessibility_granted() is False
+    assert ax.call_count == 2
+
+
+def test_no_caching_while_trust_change_settles(ax, monkeypatch):
+    # The notification can precede the flip: a stale True must not stick
+    permissions._on_ax_trust_changed(None, None, "com.apple.accessibility.api", None, None)
+    permissions._accessibility_granted()
+    permissions._accessibility_granted()
+    assert ax.call_count == 2
+    monkeypatch.setattr(
+        permissions, "_ax_changed_at",
+        permissions._ax_changed_at - permissions._AX_SETTLE_S,
+    )
+    permissions._accessibility_granted()
+    permissions._accessibility_granted()
+    assert ax.call_count == 3
@@ -1,9 +1,11 @@
 # tests/test_pipeline.py
+import queue
+import threading
 import time
 import numpy as np
 from unittest.mock import MagicMock, patch
 
-from pipeline import StreamingPipeline, SegmentResult
+from pipeline import StreamingPipeline, SegmentResult, stop_and_transcribe
 from vad import SealedSegment
 
 
@@ -62,13 +64,33 @@ def test_pipeline_process_segment_with_aec():
         end_sample=16000,
     )
     sys_audio = np.random.randn(16000).astype(np.float32) * 0.1
-    with patch("aec.nlms_echo_cancel", return_value=segment.mic_audio), \
-         patch("aec.noise_gate", return_value=segment.mic_audio):
+    with patch("pipeline.nlms_echo_cancel", return_value=segment.mic_audio), \
+         patch("pipeline.noise_gate", return_value=segment.mic_audio):
         result = pipe._process_segment(segment, sys_audio)
     assert result is not None
     assert result.text == "Clean audio."
 
 
+def test_pipeline_segment_aec_uses_selected_canceller():
+    """use_fdaf picks the frequency-domain filter, otherwise block NLMS."""
+    segment = SealedSegment(
+        segment_index=0,
+        mic_audio=np.random.randn(16000).astype(np.float32),
+        start_sample=0,
+        end_sample=16000,
+    )
+    ref = np.random.randn(16000).astype(np.float32) * 0.1
+    for use_fdaf, chosen in ((True, "fdaf_echo_cancel"), (False, "nlms_echo_cancel")):
+        pipe = FakePipeline(_make_transcriber("Clean audio."))
+        pipe.use_fdaf = use_fdaf
+        with patch("pipeline.fdaf_echo_cancel", return_value=segment.mic_audio) as fdaf, \
+             patch("pipeline.nlms_echo_cancel", return_value=segment.mic_audio) as nlms:
+            pipe._transcribe_segment(segment, ref)
+        called = {"fdaf_echo_cancel": fdaf, "nlms_echo_cancel": nlms}
+        assert called[chosen].call_count == 1
+        assert sum(m.call_count for m in called.values()) == 1
+
+
 def test_pipeline_process_segment_empty_text():
     """_process_segment returns None when transcription is empty."""
     txr = _make_transcriber("")
@@ -129,12 +151,12 @@ def test_pipeline_ordered_results():
     pipe = FakePipeline(txr)
 
     # Manually set results out of order
-    with pipe._results_lock:
-        pipe._results = [
-            SegmentResult(segment_index=2, text="Third.", audio_duration=1.0),
-            SegmentResult(segment_index=0, text="First.", audio_duration=1.0),
-            SegmentResult(segment_index=1, text="Second.", audio_duration=1.0),
-        ]
+    for r in (
+        SegmentResult(segment_index=2, text="Third.", audio_duration=1.0),
+        SegmentResult(segment_index=0, text="First.", audio_duration=1.0),
+        SegmentResult(segment_index=1, text="Second.", audio_duration=1.0),
+    ):
+        pipe._results[r.segment_index] = r
 
     pipe._active = True
     pipe._segmenter = MagicMock()
@@ -147,29 +169,170 @@ def test_pipeline_ordered_results():
     assert [r.text for r in results] == ["First.", "Second.", "Third."]
 
 
-def test_pipeline_get_sys_audio_snapshot():
-    """Snapshot concatenates available system audio chunks."""
+def test_pipeline_feed_runs_vad_on_its_own_thread():
+    """feed() only enqueues; stop() drains every chunk through the VAD thread."""
+    pipe = FakePipeline(_make_transcriber())
+    seg = MagicMock()
+    seg.segment_queue = queue.Queue()
+    seg.seal_final.return_value = None
+    seg.signal_done.side_effect = lambda: seg.segment_queue.put(None)
+    fed_on = []
+    seg.feed.side_effect = lambda chunk: fed_on.append(threading.current_thread().name)
+
+    with patch("pipeline.VADSegmenter", return_value=seg):
+        pipe.start()
+        pipe.feed(np.zeros(512, dtype=np.float32))
+        pipe.feed(np.zeros(512, dtype=np.float32))
+        assert pipe.stop(None) == []
+
+    assert fed_on == ["pipeline-vad", "pipeline-vad"]
+
+
+def _pipeline_threads():
+    return [
+        t for t in threading.enumerate()
+        if t.name in ("pipeline-vad", "pipeline-worker")
+    ]
+
+
+def test_pipeline_restart_after_discard_does_not_strand_threads():
+    """A start() without a stop() (discarded take) shuts the old session down."""
+    pipe = FakePipeline(_make_transcriber())
+    for _ in range(5):
+        pipe.start()
+        pipe.feed(np.zeros(512, dtype=np.float32))
+    pipe.stop(None)
+    for _ in range(100):
+        if not _pipeline_threads():
+            break
+        time.sleep(0.01)
+    assert _pipeline_threads() == []
+
+
+def test_pipeline_abandoned_worker_keeps_results_out_of_new_session():
+    """A worker from a discarded take stores into its own session's dict."""
+    pipe = FakePipeline(_make_transcriber("Old."))
+    old_results = {}
+    q = queue.SimpleQueue()
+    q.put(_segment(0))
+    q.put(None)
+    pipe._results = {}
+    pipe._worker_loop(q, old_results)
+    assert list(old_results) == [0]
+    assert pipe._results == {}
+
+
+def _segment(index, n=16000, start=0):
+    return SealedSegment(
+        segment_index=index,
+        mic_audio=np.full(n, index + 1, dtype=np.float32),
+        start_sample=start,
+        end_sample=start + n,
+    )
+
+
+def test_pipeline_worker_batches_queued_segments():
+    """Segments already queued are transcribed together, in order."""
+    txr = _make_transcriber("Batched.")
+    pipe = FakePipeline(txr)
+    q = queue.SimpleQueue()
+    for i in range(3):
+        q.put(_segment(i, start=i * 16000))
+    q.put(None)
+
+    pipe._worker_loop(q)
+
+    txr.transcribe_array.assert_called_once()
+    assert [(r.segment_index, r.audio_duration) for r in pipe._results.values()] == [(0, 3.0)]
+
+
+def test_pipeline_batch_separates_segments_with_silence():
+    """Batched audio is segment, gap, segment, ...; duration excludes gaps."""
+    txr = _make_transcriber("Batched.")
+    pipe = FakePipeline(txr)
+    gap = int(pipe.BATCH_GAP_S * 16000)
+
+    result = pipe._transcribe_batch([_segment(0, n=800), _segment(1, n=1600)])
+
+    audio = txr.transcribe_array.call_args[0][0]
+    assert audio.dtype == np.float32
+    assert len(audio) == 800 + gap + 1600
+    np.testing.assert_array_equal(audio[:800], 1)
+    np.testing.assert_array_equal(audio[800:800 + gap], 0)
+    np.testing.assert_array_equal(audio[800 + gap:], 2)
+    assert result.audio_duration == 0.15
+
+
+def test_pipeline_worker_splits_batches_at_limits():
+    """Batches stop at MAX_BATCH_SEGMENTS and MAX_BATCH_S."""
+    txr = _make_transcriber("Part.")
+    pipe = FakePipeline(txr)
+    pipe.MAX_BATCH_SEGMENTS = 2
+    pipe.MAX_BATCH_S = 2.5
+    q = queue.SimpleQueue()
+    q.put(_segment(0))
+    q.put(_segment(1, n=8000))
+    q.put(_segment(2))              # would exceed 2 segments
+    q.put(_segment(3, n=32000))     # would exceed 2.5 s
+    q.put(None)
+
+    pipe._worker_loop(q)
+
+    assert sorted(pipe._results) == [0, 2, 3]
+    assert [pipe._results[i].audio_duration for i in (0, 2, 3)] == [1.5, 1.0, 2.0]
+
+
+def test_pipeline_sys_audio_window_spans_chunks():
+    """Window copies only the overlapping chunk ranges."""
     pipe = FakePipeline(_make_transcriber())
     pipe._sys_audio_chunks = [
-        np.ones(1000, dtype=np.float32),
-        np.ones(2000, dtype=np.float32) * 2,
+        np.arange(0, 1000, dtype=np.float32),
+        np.arange(1000, 3000, dtype=np.float32),
+        np.arange(3000, 3500, dtype=np.float32),
     ]
-    snapshot = pipe._get_sys_audio_snapshot()
-    assert snapshot is not None
-    assert len(snapshot) == 3000
-    assert snapshot[0] == 1.0
-    assert snapshot[1500] == 2.0
+    window = pipe._sys_audio_window(900, 3100)
+    np.testing.assert_array_equal(window, np.arange(900, 3100, dtype=np.float32))
 
 
-def test_pipeline_get_sys_audio_snapshot_none():
-    """Snapshot returns None when no system audio."""
+def test_pipeline_sys_audio_window_pads_and_tracks_new_chunks():
+    """Uncaptured samples are zero; chunks appended later are picked up."""
     pipe = FakePipeline(_make_transcriber())
-    pipe._sys_audio_chunks = None
-    assert pipe._get_sys_audio_snapshot() is None
+    chunks = [np.ones(1000, dtype=np.float32)]
+    pipe._sys_audio_chunks = chunks
+    window = pipe._sys_audio_window(500, 2000)
+    np.testing.assert_array_equal(window[:500], np.ones(500, dtype=np.float32))
+    np.testing.assert_array_equal(window[500:], np.zeros(1000, dtype=np.float32))
+
+    chunks.append(np.full(1000, 2.0, dtype=np.float32))
+    window = pipe._sys_audio_window(1500, 1600)
+    np.testing.assert_array_equal(window, np.full(100, 2.0, dtype=np.float32))
 
 
-def test_pipeline_get_sys_audio_snapshot_empty():
-    """Snapshot returns None when chunk list is empty."""
+def test_pipeline_sys_audio_window_none():
+    """Window is None without system audio or past the captured audio."""
     pipe = FakePipeline(_make_transcriber())
+    pipe._sys_audio_chunks = None
+    assert pipe._sys_audio_window(0, 100) is None
     pipe._sys_audio_chunks = []
-    assert pipe._get_sys_audio_snapshot() is None
+    assert pipe._sys_audio_window(0, 100) is None
+    pipe._sys_audio_chunks = [np.ones(50, dtype=np.float32)]
+    assert pipe._sys_audio_window(50, 100) is None
+
+
+def test_stop_and_transcribe_single_pass_without_pipeline():
+    rec = MagicMock()
+    rec.sample_rate = 16000
+    rec.stop_audio.return_value = np.zeros(24000, dtype=np.float32)
+    txr = MagicMock()
+    txr.transcribe.return_value = "Hello."
+    text, elapsed, duration = stop_and_transcribe(rec, txr, None)
+    assert text == "Hello."
+    assert duration == 1.5
+    assert elapsed >= 0
+    txr.transcribe.assert_called_once_with(rec.stop_audio.return_value)
+
+
+def test_stop_and_transcribe_no_audio():
+    rec = MagicMock()
+    rec.stop_audio.return_value = None
+    assert stop_and_transcribe(rec, MagicMock(), None) == (None, 0, 0)
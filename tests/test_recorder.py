@@ -1,5 +1,6 @@
 # tests/test_recorder.py
 import numpy as np
+import pytest
 from unittest.mock import patch, MagicMock
 from recorder import AudioRecorder
 
@@ -24,34 +25,59 @@ def test_recorder_start_sets_recording_flag():
             mock_instance.start.assert_called_once()
 
 
-def test_recorder_stop_returns_wav_path():
+def test_recorder_stop_audio_returns_clipped_array():
+    rec = AudioRecorder()
+    rec.is_recording = True
+    rec._chunks = [np.full((1600, 1), 1.5, dtype=np.float32)]
+    rec._stream = MagicMock()
+    audio = rec.stop_audio()
+    assert audio.dtype == np.float32
+    assert audio.shape == (1600,)
+    assert audio.max() == 1.0
+    assert rec.is_recording is False
+
+
+def test_recorder_stop_audio_empty_returns_none():
+    rec = AudioRecorder()
+    rec.is_recording = True
+    rec._chunks = []
+    rec._stream = MagicMock()
+    assert rec.stop_audio() is None
+
+
+def test_recorder_discard_drops_audio():
     rec = AudioRecorder()
     rec.is_recording = True
     rec._chunks = [np.zeros((1600, 1), dtype=np.float32)]
-    with patch('recorder.sd.InputStream'):
-        rec._stream = MagicMock()
-        path = rec.stop()
-        assert path.endswith('.wav')
-        assert rec.is_recording is False
+    stream = MagicMock()
+    rec._stream = stream
+    rec.discard()
+    stream.stop.assert_called_once()
+    assert rec._chunks == []
+    assert rec.is_recording is False
 
 
-def test_recorder_callback_appends_chunks():
+def test_recorder_callback_writes_into_block():
     rec = AudioRecorder()
     rec.is_recording = True
     rec._chunks = []
     fake_data = np.random.randn(1600, 1).astype(np.float32)
     rec._audio_callback(fake_data, 1600, None, None)
-    assert len(rec._chunks) == 1
-    np.testing.assert_array_equal(rec._chunks[0], fake_data)
+    assert rec._block_pos == 1600
+    np.testing.assert_array_equal(rec._block[:1600], fake_data[:, 0])
 
 
-def test_recorder_stop_empty_returns_empty_string():
+def test_recorder_callback_rolls_over_to_new_block():
     rec = AudioRecorder()
     rec.is_recording = True
-    rec._chunks = []
-    rec._stream = MagicMock()
-    path = rec.stop()
-    assert path == ""
+    rec._block = np.empty(2000, dtype=np.float32)
+    first = np.full((1600, 1), 1.0, dtype=np.float32)
+    second = np.full((1600, 1), 2.0, dtype=np.float32)
+    rec._audio_callback(first, 1600, None, None)
+    rec._audio_callback(second, 1600, None, None)
+    assert len(rec._chunks) == 1
+    mic, _ = rec.stop_raw()
+    np.testing.assert_array_equal(mic, np.concatenate([first[:, 0], second[:, 0]]))
 
 
 def test_audio_callback_fires_amplitude_callback():
@@ -86,7 +112,7 @@ def test_vad_chunk_callback_fires_during_recording():
     fake_data = np.ones((1600, 1), dtype=np.float32) * 0.5
     rec._audio_callback(fake_data, 1600, None, None)
     assert len(received) == 1
-    np.testing.assert_array_equal(received[0], fake_data)
+    np.testing.assert_array_equal(received[0], fake_data[:, 0])
 
 
 def test_stop_raw_returns_mic_and_sys_audio():
@@ -124,3 +150,55 @@ def test_get_sys_audio_chunks_returns_list():
     rec._sys_capture = fake_capture
     result = rec.get_sys_audio_chunks()
     assert result is fake_capture._chunks
+
+
+def test_recorder_start_refuses_second_caller_until_stopped():
+    rec = AudioRecorder()
+    with patch('recorder.sd.InputStream'):
+        assert rec.start() is True
+        assert rec.start() is False
+        rec.discard()
+        assert rec.start() is True
+
+
+def test_recorder_failed_start_releases_claim():
+    rec = AudioRecorder()
+    with patch('recorder.sd.InputStream') as mock_stream:
+        mock_stream.return_value.start.side_effect = RuntimeError("no device")
+        with pytest.raises(RuntimeError):
+            rec.start()
+        mock_stream.return_value.close.assert_called_once()
+        assert rec.is_recording is False
+        mock_stream.return_value.start.side_effect = None
+        assert rec.start() is True
+
+
+def test_recorder_claim_held_until_buffers_are_taken():
+    rec = AudioRecorder()
+    rec._claimed = True
+    rec._chunks = [np.ones((1600, 1), dtype=np.float32)]
+    claimed_during_take = []
+    take = rec._take_audio
+
+    def checked_take():
+        # A start() here must still be refused
+        claimed_during_take.append(rec.start())
+        return take()
+
+    rec._take_audio = checked_take
+    mic, _ = rec.stop_raw()
+    assert claimed_during_take == [False]
+    assert len(mic) == 1600
+    assert rec._claimed is False
+
+
+def test_stop_raw_joins_chunks_in_order():
+    rec = AudioRecorder()
+    rec._chunks = [
+        np.full((3, 1), 1.0, dtype=np.float32),
+        np.full((2, 1), 2.0, dtype=np.float32),
+    ]
+    mic, _ = rec.stop_raw()
+    np.testing.assert_array_equal(mic, [1, 1, 1, 2, 2])
+    assert mic.ndim == 1
+    assert rec._chunks == []
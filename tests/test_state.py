@@ -52,3 +52,13 @@ def test_amplitude_callback_fires():
     sm.on_amplitude(lambda val: received.append(val))
     sm.push_amplitude(0.7)
     assert received == [0.7]
+
+
+def test_unregister_returned_by_on_state_change():
+    sm = AppStateManager()
+    calls = []
+    remove = sm.on_state_change(lambda old, new: calls.append(new))
+    remove()
+    remove()  # idempotent
+    sm.set_state(AppState.RECORDING)
+    assert calls == []
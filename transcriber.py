@@ -1,6 +1,7 @@
 # transcriber.py
 import tempfile
 import os
+import threading
 
 import numpy as np
 from scipy.io import wavfile
@@ -23,6 +24,9 @@ class WhisperTranscriber:
         self.is_ready = False
         self.status = "not_started"  # not_started, downloading, loading, ready, error
         self.status_message = "Initializing..."
+        # mlx_whisper is not reentrant and the UI, hotkey and pipeline
+        # workers all transcribe: serialise every call on one lock
+        self._lock = threading.Lock()
 
     def warmup(self):
         """Run a tiny transcription to pre-load the model into memory."""
@@ -57,13 +61,15 @@ class WhisperTranscriber:
             except OSError:
                 pass
 
-    def transcribe(self, audio_path: str) -> str:
-        result = mlx_whisper.transcribe(
-            audio_path,
-            path_or_hf_repo=self.model_repo,
-            language="en",
-            condition_on_previous_text=False,
-        )
+    def transcribe(self, audio: str | np.ndarray) -> str:
+        """Transcribe an audio file path or a 16 kHz float32 array."""
+        with self._lock:
+            result = mlx_whisper.transcribe(
+                audio,
+                path_or_hf_repo=self.model_repo,
+                language="en",
+                condition_on_previous_text=False,
+            )
         self.is_ready = True
         return result["text"].strip()
 
@@ -72,13 +78,14 @@ class WhisperTranscriber:
 
         Uses anti-hallucination parameters tuned for segmented audio.
         """
-        result = mlx_whisper.transcribe(
-            audio,
-            path_or_hf_repo=self.model_repo,
-            language="en",
-            condition_on_previous_text=False,
-            hallucination_silence_threshold=2.0,
-            compression_ratio_threshold=2.4,
-        )
+        with self._lock:
+            result = mlx_whisper.transcribe(
+                audio,
+                path_or_hf_repo=self.model_repo,
+                language="en",
+                condition_on_previous_text=False,
+                hallucination_silence_threshold=2.0,
+                compression_ratio_threshold=2.4,
+            )
         self.is_ready = True
         return result["text"].strip()
@@ -110,7 +110,7 @@ class VADSegmenter:
     """Analyzes audio chunks from the recorder callback, detects speech
     boundaries, and produces SealedSegments.
 
-    Thread safety: feed() is called from the sounddevice callback thread.
+    Thread safety: feed() is called from the pipeline's VAD thread.
     The segment_queue is consumed by the pipeline worker thread.
     """
 
@@ -120,7 +120,7 @@ class VADSegmenter:
     def __init__(self, vad: SileroVAD, sample_rate: int = VAD_SAMPLE_RATE):
         self.vad = vad
         self.sample_rate = sample_rate
-        self.segment_queue: queue.Queue[Optional[SealedSegment]] = queue.Queue()
+        self.segment_queue: queue.SimpleQueue[Optional[SealedSegment]] = queue.SimpleQueue()
 
         self._silence_threshold_samples = int(
             self.SILENCE_THRESHOLD_MS * sample_rate / 1000
@@ -148,12 +148,12 @@ class VADSegmenter:
                 break
 
     def feed(self, chunk: np.ndarray):
-        """Process an audio chunk from the sounddevice callback.
+        """Process an audio chunk captured by the recorder.
 
         Args:
             chunk: float32 array, shape (N, 1) or (N,), 16kHz mono.
 
-        Must be fast (< 2ms) to avoid blocking the audio callback.
+        Should keep up with real time: chunks queue up behind a slow call.
         """
         flat = chunk.flatten()
         self._current_chunks.append(flat.copy())